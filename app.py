@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+import asyncio
+import json
+from pathlib import Path
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError, field_validator
 
 # Add the project root to the path to ensure 'src' can be found
 import sys
@@ -9,7 +15,12 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.'))
 
 # Import all necessary components from your project structure
 from src.handlers.AnswerGenerator import AnswerGenerator
+from src.handlers.ConversationFlows import FLOWS
+from src.helpers.IdempotencyStore import IdempotencyKeyConflict, IdempotencyStore
+from src.helpers.JobQueue import JobQueue, JobQueueFull
+from src.models.SessionState import SessionState
 from src.utils.Logger import Logger
+from src.utils.Tracer import JsonlExporter, RingBufferExporter, tracer
 from src.config.ConfigHelper import ConfigHelper
 
 # --- 1. Application and Dependency Initialization ---
@@ -22,11 +33,46 @@ app = FastAPI(
 # These dependencies are created once when the server starts up.
 logger = Logger()
 config = ConfigHelper().config
+
+# Request tracing. Sampled traces are kept in memory for /debug/traces and,
+# if a path is configured, appended to a JSONL file.
+tracing_config = config.get("tracing", {})
+trace_buffer = RingBufferExporter(capacity=tracing_config.get("ring_size", 200))
+trace_exporters = [trace_buffer]
+if tracing_config.get("jsonl_path"):
+    trace_exporters.append(JsonlExporter(Path(tracing_config["jsonl_path"])))
+tracer.configure(sample_rate=tracing_config.get("sample_rate", 0.0), exporters=trace_exporters)
 # NOTE: This creates a single, global instance of AnswerGenerator.
 # For a production app with multiple simultaneous users, you would need to
 # manage a separate instance for each user's session (e.g., using a dictionary
 # mapping session IDs to generator instances). For this prototype, this is fine.
 answer_generator = AnswerGenerator()
+# The HTTP endpoints all advance that one session from worker threads, so
+# their generator calls are serialized. WebSocket sessions keep their own state.
+session_lock = asyncio.Lock()
+
+# Final outlines can be generated on a background worker pool instead of
+# holding the /chat request open. Jobs are persisted so they survive a restart.
+jobs_config = config.get("jobs", {})
+job_queue = JobQueue(
+    handler=lambda payload: answer_generator.generate_stage(SessionState.from_dict(payload["state"])),
+    store_dir=Path(jobs_config.get("store_dir", Path(__file__).parent / "jobs")),
+    workers=jobs_config.get("workers", 2),
+    max_depth=jobs_config.get("max_depth", 100),
+    retention_seconds=jobs_config.get("retention_seconds", 86400),
+)
+
+# Responses to requests carrying an Idempotency-Key header are remembered so
+# that client or proxy retries don't repeat the (billed) LLM calls.
+idempotency_config = config.get("idempotency", {})
+idempotency_store = IdempotencyStore(
+    ttl_seconds=idempotency_config.get("ttl_seconds", 600),
+    max_entries=idempotency_config.get("max_entries", 1000),
+)
+
+# WebSocket sessions are pinged after this many idle seconds and closed
+# after three unanswered pings.
+WS_HEARTBEAT_SECONDS = config.get("websocket", {}).get("heartbeat_seconds", 20)
 
 # --- 2. CORS (Cross-Origin Resource Sharing) Middleware ---
 # This is a security feature that is essential for web apps. It tells the
@@ -45,6 +91,13 @@ app.add_middleware(
     allow_headers=["*"], # Allow all request headers
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    with tracer.trace(f"{request.method} {request.url.path}") as span:
+        response = await call_next(request)
+        span.set("status_code", response.status_code)
+        return response
+
 # --- 3. Pydantic Models for API Data Validation ---
 # These classes define the expected structure of JSON data for requests and responses.
 # FastAPI uses them to automatically validate incoming data and serialize outgoing data.
@@ -53,43 +106,314 @@ class StartSessionRequest(BaseModel):
     stream: str
     major: str
     college: str
+    flow: Optional[str] = None
+
+    @field_validator("flow")
+    @classmethod
+    def check_flow(cls, flow: Optional[str]) -> Optional[str]:
+        # Only flows defined in ConversationFlows can be selected.
+        if flow is not None and flow not in FLOWS:
+            raise ValueError(f"Unknown flow '{flow}'. Available flows: {', '.join(FLOWS)}")
+        return flow
 
 class ChatRequest(BaseModel):
     message: str
+    use_job: bool = False
 
 class ApiResponse(BaseModel):
     response: str
     is_complete: bool
+    job_id: Optional[str] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    response: Optional[str] = None
+    is_complete: bool
+    error: Optional[str] = None
 
 # --- 4. API Endpoints ---
 # These are the functions that handle incoming HTTP requests.
+async def _run_idempotent(scope: str, key: Optional[str], request: BaseModel, compute):
+    """
+    Runs `compute` once per idempotency key. Retries with the same key get the
+    stored response, or wait for the original if it is still in flight.
+    """
+    if not key:
+        return await compute()
+    try:
+        return await idempotency_store.run(f"{scope}:{key}", request.model_dump_json(), compute)
+    except IdempotencyKeyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @app.post("/start-session", response_model=ApiResponse)
-async def start_session(request: StartSessionRequest):
+async def start_session(request: StartSessionRequest, idempotency_key: Optional[str] = Header(default=None)):
     """
     Endpoint to start a new brainstorming session.
-    Receives user details and returns the first personalized question.
+    Receives user details (and optionally the conversation flow) and returns
+    the first personalized question.
     """
     logger.info(f"Received request to start a new session for user: {request.name}")
-    
-    first_question = answer_generator.start_session(
-        name=request.name,
-        stream=request.stream,
-        major=request.major,
-        college=request.college
-    )
-    
-    return ApiResponse(response=first_question, is_complete=False)
+
+    async def compute():
+        # Generation runs in a thread so that retries can be accepted (and
+        # attached to this request) while it is in flight.
+        async with session_lock:
+            first_question = await asyncio.to_thread(
+                answer_generator.start_session,
+                name=request.name,
+                stream=request.stream,
+                major=request.major,
+                college=request.college,
+                flow=request.flow,
+            )
+        return ApiResponse(response=first_question, is_complete=False)
+
+    return await _run_idempotent("start-session", idempotency_key, request, compute)
 
 @app.post("/chat", response_model=ApiResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, idempotency_key: Optional[str] = Header(default=None)):
     """
     Endpoint to handle a message during an ongoing conversation.
     Receives the user's answer and returns the AI's next response.
     """
     logger.info(f"Received chat message: '{request.message[:50]}...'")
-    
-    ai_response = answer_generator.chat(request.message)
-    is_complete = answer_generator.conversation_stage == "COMPLETED"
-    
-    return ApiResponse(response=ai_response, is_complete=is_complete)
 
+    async def compute():
+        async with session_lock:
+            if request.use_job:
+                state = answer_generator.begin_final_stage(request.message)
+                if state is not None:
+                    try:
+                        job_id = job_queue.submit({"state": state.to_dict()})
+                    except JobQueueFull:
+                        answer_generator.reopen_final_stage(state)
+                        raise HTTPException(status_code=503, detail="Outline queue is full, please retry shortly.")
+                    loop = asyncio.get_running_loop()
+                    job_queue.add_done_callback(
+                        job_id,
+                        lambda job: asyncio.run_coroutine_threadsafe(_reopen_if_failed(job, state), loop),
+                    )
+                    return ApiResponse(response="", is_complete=False, job_id=job_id)
+
+            ai_response = await asyncio.to_thread(answer_generator.chat, request.message)
+            is_complete = answer_generator.conversation_stage == "COMPLETED"
+        return ApiResponse(response=ai_response, is_complete=is_complete)
+
+    return await _run_idempotent("chat", idempotency_key, request, compute)
+
+
+async def _reopen_if_failed(job: dict, state: SessionState):
+    """
+    Puts the session back at its last question when its outline job failed,
+    so that the client can send the final answer again.
+    """
+    if job["status"] != JobQueue.FAILED:
+        return
+    async with session_lock:
+        if answer_generator.reopen_final_stage(state):
+            logger.info(f"Outline job {job['id']} failed, session reopened for a retry.")
+
+def _job_response(job: dict) -> JobResponse:
+    return JobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        response=job["result"],
+        is_complete=job["status"] == JobQueue.DONE,
+        error=job["error"],
+    )
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Endpoint to poll a background outline job.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-sent events stream that pushes the job once it has finished.
+    The worker signals completion, so there is no polling; a comment line is
+    sent every few seconds to keep proxies from timing out.
+    """
+    loop = asyncio.get_running_loop()
+    finished = asyncio.Event()
+    finished_job = {}
+
+    def on_done(job):
+        # Runs on the job worker thread.
+        finished_job.update(job)
+        loop.call_soon_threadsafe(finished.set)
+
+    if not job_queue.add_done_callback(job_id, on_done):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        while True:
+            try:
+                await asyncio.wait_for(finished.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {json.dumps(_job_response(finished_job).model_dump())}\n\n"
+            return
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.get("/debug/traces")
+async def debug_traces(limit: int = 10):
+    """
+    Debug endpoint listing the slowest recently sampled traces with their spans.
+    """
+    return trace_buffer.slowest(limit)
+
+@app.get("/metrics/validation")
+async def validation_metrics():
+    """
+    Endpoint exporting answer pre-validation counters, including LLM calls avoided.
+    """
+    return answer_generator.validation_stats()
+
+@app.get("/metrics/credentials")
+async def credential_metrics():
+    """
+    Endpoint exporting per-key rate-limit headroom of the OpenAI credential pool.
+    """
+    return answer_generator.credential_stats()
+
+@app.get("/metrics/hedging")
+async def hedging_metrics():
+    """
+    Endpoint exporting request hedging counters: hedge rate, aborted losers and current delay.
+    """
+    return answer_generator.hedging_stats()
+
+@app.get("/metrics/jobs")
+async def job_metrics():
+    """
+    Endpoint exporting job queue depth and wait-time statistics.
+    """
+    return job_queue.metrics()
+
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket):
+    """
+    WebSocket endpoint that binds one connection to one brainstorming session.
+
+    Client frames: {"type": "start", "name", "stream", "major", "college", "flow"?},
+    {"type": "answer", "message"} and {"type": "pong"}.
+    Server frames: {"type": "token", "text"} while the reply is generated, then
+    {"type": "stage", "stage"} and {"type": "message", "response", "is_complete"};
+    plus {"type": "ping"} heartbeats and {"type": "error", "detail"}.
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    state = SessionState()
+    missed_pings = 0
+
+    async def run_turn(generate):
+        """Runs a blocking generator call in a thread, streaming its tokens to the client."""
+        pending_tokens = []
+        tokens_ready = asyncio.Event()
+        finished = False
+
+        def push_token(text):
+            pending_tokens.append(text)
+            tokens_ready.set()
+
+        async def flush_tokens():
+            # Tokens that arrive while a send is in progress are coalesced into
+            # one frame, so a slow client gets fewer, larger frames rather
+            # than an ever-growing backlog.
+            while True:
+                await tokens_ready.wait()
+                tokens_ready.clear()
+                if pending_tokens:
+                    text = "".join(pending_tokens)
+                    pending_tokens.clear()
+                    await websocket.send_json({"type": "token", "text": text})
+                if finished:
+                    return
+
+        flusher = asyncio.create_task(flush_tokens())
+        try:
+            with tracer.trace("WS /ws/chat turn"):
+                response = await asyncio.to_thread(
+                    generate, lambda text: loop.call_soon_threadsafe(push_token, text)
+                )
+            finished = True
+            tokens_ready.set()
+            await flusher
+        finally:
+            # If generation or a send failed, the flusher would otherwise wait forever.
+            if not flusher.done():
+                flusher.cancel()
+
+        await websocket.send_json({"type": "stage", "stage": state.stage})
+        await websocket.send_json({
+            "type": "message",
+            "response": response,
+            "is_complete": state.stage == "COMPLETED",
+        })
+
+    try:
+        while True:
+            try:
+                raw = await asyncio.wait_for(websocket.receive_text(), timeout=WS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                missed_pings += 1
+                if missed_pings > 3:
+                    logger.info("Closing idle WebSocket session after missed heartbeats.")
+                    await websocket.close(code=1001)
+                    return
+                await websocket.send_json({"type": "ping"})
+                continue
+            missed_pings = 0
+
+            try:
+                frame = json.loads(raw)
+                kind = frame.get("type")
+            except (json.JSONDecodeError, AttributeError):
+                await websocket.send_json({"type": "error", "detail": "Frames must be JSON objects."})
+                continue
+
+            if kind == "pong":
+                continue
+            if kind == "ping":
+                await websocket.send_json({"type": "pong"})
+            elif kind == "start":
+                try:
+                    details = StartSessionRequest(**frame)
+                except ValidationError as e:
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+                    continue
+                logger.info(f"WebSocket session started for user: {details.name}")
+                await run_turn(lambda on_token: answer_generator.start_session(
+                    name=details.name,
+                    stream=details.stream,
+                    major=details.major,
+                    college=details.college,
+                    flow=details.flow,
+                    state=state,
+                    on_token=on_token,
+                ))
+            elif kind == "answer" and isinstance(frame.get("message"), str):
+                message = frame["message"]
+                logger.info(f"Received WebSocket message: '{message[:50]}...'")
+                await run_turn(lambda on_token: answer_generator.chat(message, state=state, on_token=on_token))
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Unsupported frame: {kind}"})
+    except WebSocketDisconnect:
+        logger.info("WebSocket session disconnected.")
+    except Exception as e:
+        logger.error("WebSocket session failed, closing it with an internal error.")
+        logger.exception(e)
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            # The connection may already be gone, e.g. if the failure was a send.
+            pass
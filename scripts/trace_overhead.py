@@ -0,0 +1,71 @@
+"""Measure the overhead of the tracing layer per instrumentation point.
+
+Times the span calls used throughout the app with sampling off (the
+production default) and with every trace sampled, plus the cost that
+Logger adds for span timing. Results are nanoseconds per call, best of
+several repeats.
+
+Usage:
+    python scripts/trace_overhead.py --iterations 200000
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.Tracer import RingBufferExporter, Tracer  # noqa: E402
+
+
+def best_ns(statement, iterations: int, repeat: int = 5) -> float:
+    """Best per-call time of ``statement`` in nanoseconds."""
+    return min(timeit.repeat(statement, number=iterations, repeat=repeat)) / iterations * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000, help="calls per timing run")
+    args = parser.parse_args()
+    iterations = args.iterations
+
+    off = Tracer(sample_rate=0.0)
+    on = Tracer()
+    on.configure(sample_rate=1.0, exporters=[RingBufferExporter(capacity=1000)])
+
+    def empty():
+        pass
+
+    def unsampled_span():
+        with off.span("AnswerGenerator.step", step="question"):
+            pass
+
+    def unsampled_trace():
+        with off.trace("POST /chat"):
+            pass
+
+    def unsampled_add_time():
+        off.add_time("log_seconds", 0.001)
+
+    def sampled_trace_with_children(children: int = 10):
+        with on.trace("POST /chat"):
+            for _ in range(children):
+                with on.span("AnswerGenerator.step", step="question"):
+                    pass
+
+    baseline = best_ns(empty, iterations)
+    rows = [
+        ("span(), sampling off", best_ns(unsampled_span, iterations) - baseline),
+        ("trace(), sampling off", best_ns(unsampled_trace, iterations) - baseline),
+        ("add_time(), sampling off", best_ns(unsampled_add_time, iterations) - baseline),
+        # One root plus ten children, exported to the ring buffer, per recorded span.
+        ("recorded span, sampling on", (best_ns(sampled_trace_with_children, iterations // 10) - baseline) / 11),
+    ]
+    for label, ns in rows:
+        print(f"{label:<28} {ns:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Measure server memory per idle /ws/chat connection.
+
+Starts the app under uvicorn with a single worker, opens N WebSocket
+connections that only answer heartbeats, and reports the server's resident
+memory (VmRSS from /proc/<pid>/status, so Linux only) before and after.
+
+Usage:
+    python scripts/ws_idle_load.py --connections 2000 --hold 30
+
+The app is imported as usual, so src/config/config.json must exist; idle
+connections never call the OpenAI API.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import websockets
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def raise_file_limit(needed: int) -> int:
+    """Raise the soft open-files limit as far as the hard limit allows."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = hard if hard == resource.RLIM_INFINITY else max(soft, hard)
+    if soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    if target != resource.RLIM_INFINITY and target < needed:
+        print(f"warning: open-files limit {target} is below the {needed} sockets needed", file=sys.stderr)
+    return target
+
+
+def rss_kib(pid: int) -> int:
+    """Return the resident set size of a process in KiB."""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError(f"VmRSS not found for pid {pid}")
+
+
+def start_server(host: str, port: int) -> subprocess.Popen:
+    """Start uvicorn with one worker and wait until it answers HTTP requests."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", host, "--port", str(port),
+         "--workers", "1", "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            urllib.request.urlopen(f"http://{host}:{port}/metrics/jobs", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 30 seconds")
+
+
+async def hold_connection(url: str, opened: asyncio.Event, stop: asyncio.Event) -> None:
+    """Keep one idle session open, answering the server's heartbeat pings."""
+    async with websockets.connect(url, ping_interval=None, max_queue=4) as websocket:
+        opened.set()
+        while not stop.is_set():
+            receive = asyncio.ensure_future(websocket.recv())
+            stopped = asyncio.ensure_future(stop.wait())
+            done, _ = await asyncio.wait({receive, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            if receive not in done:
+                receive.cancel()
+                break
+            stopped.cancel()
+            frame = json.loads(receive.result())
+            if frame.get("type") == "ping":
+                await websocket.send(json.dumps({"type": "pong"}))
+
+
+async def run_load(url: str, pid: int, connections: int, batch: int, hold: float) -> None:
+    baseline = rss_kib(pid)
+    stop = asyncio.Event()
+    tasks = []
+    started = time.perf_counter()
+    for offset in range(0, connections, batch):
+        opened = [asyncio.Event() for _ in range(min(batch, connections - offset))]
+        tasks += [asyncio.create_task(hold_connection(url, event, stop)) for event in opened]
+        await asyncio.gather(*(event.wait() for event in opened))
+    print(f"opened {connections} connections in {time.perf_counter() - started:.1f}s")
+
+    await asyncio.sleep(hold)
+    failed = sum(1 for task in tasks if task.done() and task.exception() is not None)
+    loaded = rss_kib(pid)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"server RSS idle:    {baseline / 1024:8.1f} MiB")
+    print(f"server RSS loaded:  {loaded / 1024:8.1f} MiB")
+    print(f"RSS per connection: {(loaded - baseline) / connections:8.1f} KiB")
+    if failed:
+        print(f"{failed} connections dropped while idle")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=1000, help="idle WebSocket sessions to open")
+    parser.add_argument("--batch", type=int, default=100, help="connections opened concurrently")
+    parser.add_argument("--hold", type=float, default=10.0, help="seconds to hold them open before measuring")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # The limit is inherited by the uvicorn process started below.
+    raise_file_limit(args.connections + 256)
+    server = start_server(args.host, args.port)
+    try:
+        asyncio.run(run_load(
+            f"ws://{args.host}:{args.port}/ws/chat", server.pid, args.connections, args.batch, args.hold
+        ))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
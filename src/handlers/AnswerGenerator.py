@@ -1,6 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from src.helpers.AnswerValidator import AnswerValidator
 from src.helpers.OpenAIHelper import AIHelper
 from src.helpers.PromptTemplate import PromptTemplate
+from src.handlers.ConversationFlows import (
+    DEFAULT_FLOW,
+    FLOWS,
+    INITIAL_STAGE,
+    Stage,
+    Step,
+)
+from src.models.SessionState import SessionState
 from src.utils.Logger import Logger
+from src.utils.Tracer import tracer
 from src.config.ConfigHelper import ConfigHelper
 
 class AnswerGenerator:
@@ -8,143 +21,239 @@ class AnswerGenerator:
     Manages the multi-step conversation for essay brainstorming.
     This class guides the user through a series of personalized questions
     and generates a final essay outline based on their answers.
+
+    The conversation is driven by the stage tables in ConversationFlows:
+    each stage declares the LLM steps it runs and the stage that follows it.
     """
-    def __init__(self):
+    def __init__(self, flow: str = DEFAULT_FLOW):
         self.__config = ConfigHelper().config
         self.__logger = Logger()
         self.__prompt_template = PromptTemplate(self.__logger)
         self.__ai_helper = AIHelper(config=self.__config)
-        
-        # State management for the conversation
+        self.__validator = AnswerValidator(self.__config.get("validation"))
+        self.__default_flow = flow
+
+        # State management for the conversation. Callers that manage several
+        # sessions (e.g. one per WebSocket) pass their own SessionState instead.
+        self.state = SessionState(flow=flow)
         self.reset_state()
 
-    def reset_state(self):
+    def validation_stats(self) -> Dict[str, int]:
+        """Returns the answer pre-validation counters, including LLM calls avoided."""
+        return self.__validator.stats()
+
+    def hedging_stats(self):
+        """Returns the request hedging counters of the OpenAI helper."""
+        return self.__ai_helper.hedging_stats()
+
+    def credential_stats(self):
+        """Returns the per-key rate-limit accounting of the OpenAI credential pool."""
+        return self.__ai_helper.credential_stats()
+
+    @property
+    def conversation_stage(self) -> str:
+        return self.state.stage
+
+    @property
+    def user_details(self) -> Dict[str, str]:
+        return self.state.user_details
+
+    @property
+    def questions(self):
+        return self.state.questions
+
+    @property
+    def answers(self):
+        return self.state.answers
+
+    def reset_state(self, flow: Optional[str] = None, state: Optional[SessionState] = None):
         """Resets the conversation to its initial state."""
         self.__logger.info("Resetting conversation state.")
-        self.conversation_stage = "AWAITING_USER_DETAILS"
-        self.user_details = {}
-        self.questions = []
-        self.answers = []
+        (state or self.state).reset(flow or self.__default_flow, INITIAL_STAGE)
 
-    def start_session(self, name: str, stream: str, major: str, college: str) -> str:
+    def start_session(
+        self,
+        name: str,
+        stream: str,
+        major: str,
+        college: str,
+        flow: Optional[str] = None,
+        state: Optional[SessionState] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
         """
         Starts a new brainstorming session with the user's details and returns the first question.
+        If `on_token` is given, the question is also streamed to it as it is generated.
         """
-        self.reset_state()
-        self.user_details = {
+        state = state or self.state
+        self.reset_state(flow, state)
+        state.user_details = {
             "name": name,
             "education_stream": stream,
             "major": major,
             "college_name": college,
         }
-        self.__logger.info(f"New session started for: {self.user_details}")
-        return self._generate_first_question()
+        self.__logger.info(f"New session started for: {state.user_details}")
+        return self._enter_stage(FLOWS[state.flow].first_stage, state, on_token)
 
-    def chat(self, user_input: str) -> str:
+    def chat(
+        self,
+        user_input: str,
+        state: Optional[SessionState] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
         """
-        Main method to handle the user's message. It routes the input
-        to the appropriate handler based on the current conversation stage.
+        Main method to handle the user's message. It records the answer to the
+        current stage and moves the conversation on to the next one.
+        If `on_token` is given, the reply is also streamed to it as it is generated.
         """
-        self.__logger.info(f"Current conversation stage: {self.conversation_stage}")
+        state = state or self.state
+        self.__logger.info(f"Current conversation stage: {state.stage}")
 
-        if self.conversation_stage == "AWAITING_USER_DETAILS":
+        if state.stage == INITIAL_STAGE:
             # In a real application, you'd parse this from the UI.
             # For this example, we'll assume the initial input contains the details.
             # Example input: "Pramod, IT, AI/ML, MIT"
             try:
                 name, stream, major, college = [item.strip() for item in user_input.split(',')]
-                self.user_details = {
-                    "name": name,
-                    "education_stream": stream,
-                    "major": major,
-                    "college_name": college,
-                }
-                self.__logger.info(f"User details captured: {self.user_details}")
-                return self._generate_first_question()
             except ValueError:
-                self.reset_state()
+                self.reset_state(state=state)
                 return "Sorry, I didn't understand that. Please provide your details in the format: Name, Stream, Major, College Name"
+            state.user_details = {
+                "name": name,
+                "education_stream": stream,
+                "major": major,
+                "college_name": college,
+            }
+            self.__logger.info(f"User details captured: {state.user_details}")
+            return self._enter_stage(FLOWS[state.flow].first_stage, state, on_token)
 
-        elif self.conversation_stage == "AWAITING_ANSWER_1":
-            self.answers.append(user_input)
-            return self._generate_second_question()
+        stage = FLOWS[state.flow].stages.get(state.stage)
+        if stage is None or stage.next_stage is None:
+            self.reset_state(state=state)
+            return "Thank you! The session is complete. Please start a new session to begin again."
 
-        elif self.conversation_stage == "AWAITING_ANSWER_2":
-            self.answers.append(user_input)
-            return self._generate_third_question()
+        # Unusable answers get an immediate clarification without an LLM call,
+        # and the session stays at the current stage.
+        clarification = self.__validator.validate(user_input, state.answers)
+        if clarification:
+            self.__logger.info(f"Answer rejected by pre-validation at stage {state.stage}.")
+            return clarification
 
-        elif self.conversation_stage == "AWAITING_ANSWER_3":
-            self.answers.append(user_input)
-            return self._generate_final_outline()
+        state.answers.append(user_input)
+        return self._enter_stage(stage.next_stage, state, on_token)
 
-        else:
-            self.reset_state()
-            return "Thank you! The session is complete. Please start a new session to begin again."
+    def begin_final_stage(self, user_input: str) -> Optional[SessionState]:
+        """
+        Records the answer that leads into the flow's final stage without generating it.
 
-    def _generate_first_question(self) -> str:
-        """Generates and returns the first personalized question."""
-        self.__logger.info("Generating the first question.")
-        prompt = self.__prompt_template.generate_snapshot_question_prompt(
-            name=self.user_details["name"],
-            education_stream=self.user_details["education_stream"],
-            major=self.user_details["major"]
-        )
-        question = self.__ai_helper.genrate_from_prompt(
-            model=self.__config['openai']['models']['default'],
-            prompt=prompt
-        )
-        self.questions.append(question)
-        self.conversation_stage = "AWAITING_ANSWER_1"
-        return question
-
-    def _generate_second_question(self) -> str:
-        """Generates and returns the second personalized question."""
-        self.__logger.info("Generating the second question.")
-        prompt = self.__prompt_template.generate_lesson_question_prompt(
-            name=self.user_details["name"],
-            education_stream=self.user_details["education_stream"],
-            first_answer=self.answers[0]
-        )
-        question = self.__ai_helper.genrate_from_prompt(
-            model=self.__config['openai']['models']['default'],
-            prompt=prompt
-        )
-        self.questions.append(question)
-        self.conversation_stage = "AWAITING_ANSWER_2"
-        return question
-
-    def _generate_third_question(self) -> str:
-        """Generates and returns the third personalized question."""
-        self.__logger.info("Generating the third question.")
-        prompt = self.__prompt_template.generate_blueprint_question_prompt(
-            name=self.user_details["name"],
-            college_name=self.user_details["college_name"],
-            second_answer=self.answers[1]
-        )
-        question = self.__ai_helper.genrate_from_prompt(
-            model=self.__config['openai']['models']['default'],
-            prompt=prompt
-        )
-        self.questions.append(question)
-        self.conversation_stage = "AWAITING_ANSWER_3"
-        return question
-
-    def _generate_final_outline(self) -> str:
-        """Generates and returns the final essay outline."""
-        self.__logger.info("Generating the final essay outline.")
-        
-        # The essay prompt is hardcoded as per the project requirements.
-        essay_prompt = "How has your life experience contributed to your personal story—your character, values, perspectives, or skills—and what you want to pursue at this college?"
-
-        prompt = self.__prompt_template.generate_essay_outline_prompt(
-            essay_prompt=essay_prompt,
-            answer_1=self.answers[0],
-            answer_2=self.answers[1],
-            answer_3=self.answers[2]
-        )
-        outline = self.__ai_helper.genrate_from_prompt(
-            model=self.__config['openai']['models']['default'],
-            prompt=prompt
+        Returns a snapshot of the session to hand to `generate_stage` (typically on a
+        background job), or None if this answer does not lead into the final stage.
+        """
+        stage = FLOWS[self.state.flow].stages.get(self.state.stage)
+        if stage is None or stage.next_stage is None:
+            return None
+        next_stage = FLOWS[self.state.flow].stages[stage.next_stage]
+        if next_stage.next_stage is not None:
+            return None
+        if self.__validator.check(user_input, self.state.answers) is not None:
+            # Let chat() answer with the clarification prompt instead.
+            return None
+
+        self.state.answers.append(user_input)
+        self.state.stage = stage.next_stage
+        self.__logger.info(f"Final answer recorded, deferring stage: {stage.next_stage}")
+        return SessionState.from_dict(self.state.to_dict())
+
+    def reopen_final_stage(self, snapshot: SessionState) -> bool:
+        """
+        Undoes `begin_final_stage` after generating the final stage failed, so that
+        the last answer can be sent again instead of landing on a completed session.
+
+        Returns False (and changes nothing) if the session has moved on since the
+        snapshot was taken, e.g. because a new session was started.
+        """
+        if self.state.to_dict() != snapshot.to_dict():
+            return False
+        previous_stage = next(
+            (name for name, stage in FLOWS[snapshot.flow].stages.items() if stage.next_stage == snapshot.stage),
+            None,
         )
-        self.conversation_stage = "COMPLETED"
-        return f"Excellent! Here is the structured outline for your essay:\n\n{outline}"
+        if previous_stage is None:
+            return False
+
+        self.state.answers.pop()
+        self.state.stage = previous_stage
+        self.__logger.info(f"Final stage failed, reopened stage: {previous_stage}")
+        return True
+
+    def generate_stage(self, state: SessionState) -> str:
+        """Generates the message for the stage the given session snapshot is in."""
+        return self._enter_stage(state.stage, state)
+
+    def _enter_stage(
+        self,
+        stage_name: str,
+        state: Optional[SessionState] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Runs the steps of a stage, moves the session into it and returns its message."""
+        state = state or self.state
+        with tracer.span("AnswerGenerator.stage", stage=stage_name):
+            self.__logger.info(f"Entering conversation stage: {stage_name}")
+            stage: Stage = FLOWS[state.flow].stages[stage_name]
+
+            if len(stage.steps) == 1:
+                outputs = {stage.steps[0].key: self._run_step(stage.steps[0], state, on_token)}
+            else:
+                # Steps within a stage never depend on each other, so run them concurrently.
+                with ThreadPoolExecutor(max_workers=len(stage.steps)) as executor:
+                    futures = {
+                        step.key: executor.submit(tracer.wrap(self._run_step), step, state)
+                        for step in stage.steps
+                    }
+                    outputs = {key: future.result() for key, future in futures.items()}
+
+        if stage.records_question:
+            state.questions.append(outputs["question"])
+        state.stage = stage_name
+        return stage.response.format(**outputs)
+
+    def _run_step(
+        self,
+        step: Step,
+        state: SessionState,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Builds the prompt for a step and generates its output, streaming it to `on_token` if given."""
+        with tracer.span("AnswerGenerator.step", step=step.key, streamed=bool(on_token)):
+            self.__logger.info(f"Running step '{step.key}' with {step.prompt_builder}.")
+            with tracer.span(f"PromptTemplate.{step.prompt_builder}"):
+                prompt_builder = getattr(self.__prompt_template, step.prompt_builder)
+                prompt = prompt_builder(**{arg: self._resolve_input(source, state) for arg, source in step.inputs.items()})
+            if on_token:
+                chunks = []
+                for chunk in self.__ai_helper.stream_from_prompt(
+                    model=self.__config['openai']['models'][step.model],
+                    prompt=prompt,
+                    temperature=step.temperature,
+                ):
+                    chunks.append(chunk)
+                    on_token(chunk)
+                return "".join(chunks)
+            return self.__ai_helper.genrate_from_prompt(
+                model=self.__config['openai']['models'][step.model],
+                prompt=prompt,
+                temperature=step.temperature,
+            )
+
+    def _resolve_input(self, source: str, state: SessionState) -> str:
+        """Resolves a step input source such as `user.name` or `answers.0`."""
+        scope, _, key = source.partition(".")
+        if scope == "user":
+            return state.user_details[key]
+        if scope == "answers":
+            return state.answers[int(key)]
+        if scope == "flow":
+            return FLOWS[state.flow].constants[key]
+        raise ValueError(f"Unknown step input source: {source}")
@@ -0,0 +1,158 @@
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional, Tuple
+
+INITIAL_STAGE = "AWAITING_USER_DETAILS"
+COMPLETED_STAGE = "COMPLETED"
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    """
+    A single LLM call made when a stage is entered.
+
+    Attributes:
+        key (str): Name under which the generated text is exposed to the stage's response template.
+        prompt_builder (str): Name of the PromptTemplate method that builds the prompt.
+        inputs (Mapping[str, str]): Maps each prompt argument to a source. Sources are
+            `user.<field>`, `answers.<index>` or `flow.<constant>`.
+        model (str): Key of the model in config['openai']['models'].
+        temperature (float): Sampling temperature for the call.
+    """
+    key: str
+    prompt_builder: str
+    inputs: Mapping[str, str]
+    model: str = "default"
+    temperature: float = 0
+
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    """
+    A conversation stage. Its steps run (concurrently, when there are several)
+    as soon as the stage is entered, and the stage then waits for the user's
+    answer before moving on to `next_stage`.
+
+    Attributes:
+        steps (Tuple[Step, ...]): LLM calls that produce this stage's message.
+        response (str): Template for the message, formatted with the step outputs.
+        next_stage (Optional[str]): Stage entered after the user answers; None for a final stage.
+        records_question (bool): Whether the `question` step output is stored in the session.
+    """
+    steps: Tuple[Step, ...]
+    response: str
+    next_stage: Optional[str] = None
+    records_question: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class Flow:
+    """A complete brainstorming flow, described entirely as data."""
+    first_stage: str
+    stages: Mapping[str, Stage]
+    constants: Mapping[str, str] = field(default_factory=dict)
+
+
+_SNAPSHOT_QUESTION = Step(
+    key="question",
+    prompt_builder="generate_snapshot_question_prompt",
+    inputs={
+        "name": "user.name",
+        "education_stream": "user.education_stream",
+        "major": "user.major",
+    },
+)
+
+_LESSON_QUESTION = Step(
+    key="question",
+    prompt_builder="generate_lesson_question_prompt",
+    inputs={
+        "name": "user.name",
+        "education_stream": "user.education_stream",
+        "first_answer": "answers.0",
+    },
+)
+
+_BLUEPRINT_QUESTION = Step(
+    key="question",
+    prompt_builder="generate_blueprint_question_prompt",
+    inputs={
+        "name": "user.name",
+        "college_name": "user.college_name",
+        "second_answer": "answers.1",
+    },
+)
+
+_ESSAY_OUTLINE = Step(
+    key="outline",
+    prompt_builder="generate_essay_outline_prompt",
+    inputs={
+        "essay_prompt": "flow.essay_prompt",
+        "answer_1": "answers.0",
+        "answer_2": "answers.1",
+        "answer_3": "answers.2",
+    },
+)
+
+_ESSAY_TITLE = Step(
+    key="title",
+    prompt_builder="generate_essay_title_prompt",
+    inputs={
+        "essay_prompt": "flow.essay_prompt",
+        "answer_1": "answers.0",
+        "answer_3": "answers.2",
+    },
+    temperature=0.7,
+)
+
+_THREE_QUESTION_STAGES = {
+    "AWAITING_ANSWER_1": Stage(
+        steps=(_SNAPSHOT_QUESTION,),
+        response="{question}",
+        next_stage="AWAITING_ANSWER_2",
+    ),
+    "AWAITING_ANSWER_2": Stage(
+        steps=(_LESSON_QUESTION,),
+        response="{question}",
+        next_stage="AWAITING_ANSWER_3",
+    ),
+    "AWAITING_ANSWER_3": Stage(
+        steps=(_BLUEPRINT_QUESTION,),
+        response="{question}",
+        next_stage=COMPLETED_STAGE,
+    ),
+}
+
+FLOWS: Dict[str, Flow] = {
+    "personal_statement": Flow(
+        first_stage="AWAITING_ANSWER_1",
+        stages={
+            **_THREE_QUESTION_STAGES,
+            COMPLETED_STAGE: Stage(
+                steps=(_ESSAY_OUTLINE,),
+                response="Excellent! Here is the structured outline for your essay:\n\n{outline}",
+                records_question=False,
+            ),
+        },
+        constants={
+            # The essay prompt is hardcoded as per the project requirements.
+            "essay_prompt": "How has your life experience contributed to your personal story—your character, values, perspectives, or skills—and what you want to pursue at this college?",
+        },
+    ),
+    "community_supplement": Flow(
+        first_stage="AWAITING_ANSWER_1",
+        stages={
+            **_THREE_QUESTION_STAGES,
+            # The outline and the title don't depend on each other, so they run concurrently.
+            COMPLETED_STAGE: Stage(
+                steps=(_ESSAY_OUTLINE, _ESSAY_TITLE),
+                response="Excellent! Here is the structured outline for your supplemental essay, \"{title}\":\n\n{outline}",
+                records_question=False,
+            ),
+        },
+        constants={
+            "essay_prompt": "Describe a community you belong to and how you would contribute to the community at this college.",
+        },
+    ),
+}
+
+DEFAULT_FLOW = "personal_statement"
@@ -0,0 +1,77 @@
+"""Tiny local classifier for low-effort answers, used by AnswerValidator."""
+
+import math
+import re
+from typing import Dict
+
+_WORD_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+# Phrases that signal the student is dodging the question.
+_EVASIVE_PHRASES = (
+    "i don't know", "i dont know", "idk", "no idea", "not sure", "nothing really",
+    "nothing much", "can't think", "cant think", "n/a", "whatever", "i guess",
+    "same as before", "same as above", "skip", "pass", "no comment",
+)
+_EVASIVE_RE = re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, _EVASIVE_PHRASES)) + r")(?!\w)")
+
+# Words that carry little meaning on their own.
+_FILLER_WORDS = frozenset(
+    "a an and are as at be been but by can could did do does for from get got had has have "
+    "he her his i if in into is it its just like maybe me my no not of on or our really she "
+    "so some something stuff that the their them then there they thing things this to too "
+    "very was we were what when which who will with would you your yes yeah ok okay".split()
+)
+
+# Hand-tuned weights of a logistic model over the features below: an answer
+# needs an evasive phrase, or hardly any content words, to be flagged.
+_WEIGHTS: Dict[str, float] = {
+    "bias": -3.0,
+    "evasive_phrases": 3.0,
+    "few_content_words": 4.0,
+    "filler_ratio": 2.5,
+    "no_specifics": 0.5,
+}
+
+
+class LowEffortClassifier:
+    """Scores how likely an answer is a low-effort non-answer.
+
+    A logistic model over a handful of cheap features: evasive phrases
+    ("not sure", "idk"), how few content words there are, the share of
+    filler words and the absence of specifics such as numbers or names.
+    Calling the classifier returns True when the score reaches ``threshold``,
+    which is what ``AnswerValidator`` expects of a classifier.
+    """
+
+    def __init__(self, threshold: float = 0.5) -> None:
+        """Initialize the classifier.
+
+        Args:
+            threshold: Score (0.0 - 1.0) from which an answer is flagged
+        """
+        self._threshold = threshold
+
+    def features(self, text: str) -> Dict[str, float]:
+        """Return the model's features for ``text``."""
+        lowered = text.lower()
+        words = _WORD_RE.findall(lowered)
+        content_words = [word for word in words if word not in _FILLER_WORDS and len(word) > 2]
+        has_specifics = any(char.isdigit() for char in text) or any(
+            word[:1].isupper() for word in text.split()[1:]
+        )
+        return {
+            "bias": 1.0,
+            "evasive_phrases": float(len(_EVASIVE_RE.findall(lowered))),
+            "few_content_words": max(0.0, 4 - len(content_words)) / 4,
+            "filler_ratio": (len(words) - len(content_words)) / len(words) if words else 1.0,
+            "no_specifics": 0.0 if has_specifics else 1.0,
+        }
+
+    def score(self, text: str) -> float:
+        """Return the probability (0.0 - 1.0) that ``text`` is a low-effort answer."""
+        features = self.features(text)
+        logit = sum(_WEIGHTS[name] * value for name, value in features.items())
+        return 1 / (1 + math.exp(-logit))
+
+    def __call__(self, text: str) -> bool:
+        return self.score(text) >= self._threshold
@@ -0,0 +1,123 @@
+"""Fast local checks that catch unusable answers before they reach the LLM."""
+
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from src.helpers.AnswerClassifier import LowEffortClassifier
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+_REPEATED_CHAR_RE = re.compile(r"([^\W\d_])\1{5,}")
+_VOWEL_RE = re.compile(r"[aeiouy]", re.IGNORECASE)
+
+_CLARIFICATIONS = {
+    "empty": "It looks like your answer was empty. Could you share a few sentences about it?",
+    "too_short": "Could you tell me a little more? A few sentences will help me ask a better follow-up question.",
+    "repetitive": "Your answer seems to repeat itself. Could you describe it in your own words, with a specific detail or two?",
+    "duplicate": "That looks the same as your previous answer. Could you answer this question specifically?",
+    "gibberish": "I couldn't quite make sense of that answer. Could you describe it in a few full sentences?",
+    "language": "Could you answer in English? That will help me tailor the next question for you.",
+    "classifier": "Could you expand on that with a specific example from your own experience?",
+}
+
+
+class AnswerValidator:
+    """Runs cheap, CPU-only heuristics on a student's answer.
+
+    ``check`` returns the reason an answer should be sent back to the student,
+    or None if it looks usable. ``validate`` does the same but returns the
+    clarification message and counts how many LLM calls were avoided.
+    An optional ``classifier`` callable (returning True for low-quality
+    answers) runs after the heuristics for answers that pass them; setting
+    ``config['classifier']['enabled']`` uses the bundled LowEffortClassifier.
+    """
+
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        classifier: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        """Initialize the validator.
+
+        Args:
+            config: Optional settings (``enabled``, ``min_words``,
+                ``min_unique_ratio``, ``min_alpha_ratio``, ``check_language``,
+                ``min_ascii_ratio``, and ``classifier`` with ``enabled``
+                and ``threshold``)
+            classifier: Optional local model flagging low-quality answers,
+                used instead of the one configured under ``classifier``
+        """
+        config = config or {}
+        self._enabled = config.get("enabled", True)
+        self._min_words = config.get("min_words", 3)
+        self._min_unique_ratio = config.get("min_unique_ratio", 0.3)
+        self._min_alpha_ratio = config.get("min_alpha_ratio", 0.5)
+        self._check_language = config.get("check_language", True)
+        self._min_ascii_ratio = config.get("min_ascii_ratio", 0.5)
+        classifier_config = config.get("classifier") or {}
+        if classifier is None and classifier_config.get("enabled", False):
+            classifier = LowEffortClassifier(threshold=classifier_config.get("threshold", 0.5))
+        self._classifier = classifier
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._rejections: Dict[str, int] = {}
+
+    def check(self, answer: str, previous_answers: Optional[List[str]] = None) -> Optional[str]:
+        """Return the rejection reason for ``answer``, or None if it is usable."""
+        if not self._enabled:
+            return None
+        text = answer.strip()
+        if not text:
+            return "empty"
+
+        # The language check only looks at the script: answers written mostly
+        # in non-Latin letters are caught, but other Latin-script languages
+        # (Spanish, French, ...) are not told apart from English. Word lists
+        # would also reject terse, phrase-style English answers.
+        if self._check_language:
+            letters = [char for char in text if char.isalpha()]
+            if letters and sum(char.isascii() for char in letters) / len(letters) < self._min_ascii_ratio:
+                return "language"
+
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < self._min_words:
+            return "too_short"
+
+        if previous_answers and text.lower() in (previous.strip().lower() for previous in previous_answers):
+            return "duplicate"
+
+        if _REPEATED_CHAR_RE.search(text):
+            return "repetitive"
+        if len(words) >= 8 and len(set(words)) / len(words) < self._min_unique_ratio:
+            return "repetitive"
+
+        letters = sum(len(word) for word in words)
+        non_space = len("".join(text.split()))
+        if letters / non_space < self._min_alpha_ratio:
+            return "gibberish"
+        ascii_words = [word for word in words if word.isascii()]
+        voweless = sum(1 for word in ascii_words if len(word) > 3 and not _VOWEL_RE.search(word))
+        if ascii_words and voweless / len(ascii_words) >= 0.5:
+            return "gibberish"
+
+        if self._classifier is not None and self._classifier(text):
+            return "classifier"
+        return None
+
+    def validate(self, answer: str, previous_answers: Optional[List[str]] = None) -> Optional[str]:
+        """Return a clarification prompt for an unusable answer, or None if it is usable."""
+        reason = self.check(answer, previous_answers)
+        with self._lock:
+            self._checked += 1
+            if reason is not None:
+                self._rejections[reason] = self._rejections.get(reason, 0) + 1
+        return _CLARIFICATIONS[reason] if reason else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many answers were checked and how many LLM calls were avoided."""
+        with self._lock:
+            return {
+                "answers_checked": self._checked,
+                "llm_calls_avoided": sum(self._rejections.values()),
+                "rejections": dict(self._rejections),
+            }
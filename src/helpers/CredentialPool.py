@@ -0,0 +1,199 @@
+"""Pool of OpenAI API keys with per-key rate-limit accounting."""
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from openai import OpenAI
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse an OpenAI reset duration such as ``"6m0s"`` or ``"20ms"`` into seconds."""
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class Credential:
+    """One API key, its client and its last known rate-limit state."""
+
+    def __init__(self, name: str, api_key: str) -> None:
+        self.name = name
+        # The SDK's own retries would hit a rate-limited key again; the pool
+        # decides when to retry and on which key.
+        self.client = OpenAI(api_key=api_key, max_retries=0)
+        self.limit_requests: Optional[int] = None
+        self.limit_tokens: Optional[int] = None
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.parked_until = 0.0
+        self.in_flight = 0
+
+    def available_at(self, now: float) -> float:
+        """Monotonic time from which this key may be used.
+
+        That is after a 429 parking, or after the current window resets if
+        the known request or token budget is already used up.
+        """
+        available_at = self.parked_until
+        if (self.remaining_requests is not None and now < self.requests_reset_at
+                and self.remaining_requests - self.in_flight <= 0):
+            available_at = max(available_at, self.requests_reset_at)
+        if self.remaining_tokens is not None and now < self.tokens_reset_at and self.remaining_tokens <= 0:
+            available_at = max(available_at, self.tokens_reset_at)
+        return available_at
+
+    def headroom(self, now: float) -> float:
+        """Fraction (0.0 - 1.0) of this key's request and token quota still available.
+
+        Keys without rate-limit information yet, or whose window has reset,
+        count as fully available. Calls in flight are deducted from the
+        remaining request budget.
+        """
+        fractions = [1.0]
+        if self.remaining_requests is not None and self.limit_requests and now < self.requests_reset_at:
+            fractions.append((self.remaining_requests - self.in_flight) / self.limit_requests)
+        elif self.limit_requests:
+            fractions.append((self.limit_requests - self.in_flight) / self.limit_requests)
+        if self.remaining_tokens is not None and self.limit_tokens and now < self.tokens_reset_at:
+            fractions.append(self.remaining_tokens / self.limit_tokens)
+        return min(fractions)
+
+
+class CredentialPool:
+    """Spreads OpenAI calls across several API keys.
+
+    Keys are taken from ``config['openai']['credentials']``, optionally
+    restricted to the names listed in ``config['openai']['credential_pool']``.
+    ``acquire`` returns the usable key with the most headroom and ``release``
+    updates its state from the response headers; a 429 parks the key until
+    its reset time. Accounting is guarded by a lock held only for a few
+    arithmetic operations and no method ever sleeps, so the pool is safe to
+    use from worker threads and from the asyncio event loop alike.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        """Initialize the pool with one client per configured key.
+
+        Args:
+            config: Configuration dictionary containing OpenAI API settings.
+        """
+        credentials = config["openai"]["credentials"]
+        names = config["openai"].get("credential_pool") or list(credentials)
+        # Every configured key can be requested by name; only pooled keys are rotated.
+        self._by_name = {name: Credential(name, api_key) for name, api_key in credentials.items()}
+        self._credentials: List[Credential] = [self._by_name[name] for name in names]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._credentials)
+
+    def get(self, name: str) -> Credential:
+        """Return the credential with the given name."""
+        return self._by_name[name]
+
+    def acquire(self, name: Optional[str] = None) -> Tuple[Credential, float]:
+        """Reserve the key with the most headroom (or the named key) for one call.
+
+        This never blocks. When the returned wait is non-zero the caller
+        should ``cancel`` the reservation, sleep (``time.sleep`` in a worker
+        thread, ``await asyncio.sleep`` on the event loop) and acquire again,
+        so that the waiting call does not hold one of the key's request slots.
+
+        Returns:
+            The credential and the number of seconds the caller should wait
+            before using it. The wait is non-zero only when every key is
+            parked or out of quota, in which case the soonest usable key is returned.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if name is not None:
+                credential = self._by_name[name]
+            else:
+                usable = [c for c in self._credentials if c.available_at(now) <= now]
+                if usable:
+                    credential = max(usable, key=lambda c: c.headroom(now))
+                else:
+                    credential = min(self._credentials, key=lambda c: c.available_at(now))
+            wait_seconds = max(0.0, credential.available_at(now) - now)
+            credential.in_flight += 1
+            return credential, wait_seconds
+
+    def cancel(self, credential: Credential) -> None:
+        """Give back a key reserved by ``acquire`` without having called the API."""
+        with self._lock:
+            credential.in_flight -= 1
+
+    def release(
+        self,
+        credential: Credential,
+        headers: Optional[Mapping[str, str]] = None,
+        rate_limited: bool = False,
+    ) -> None:
+        """Return a key after a call and record the rate-limit headers it sent back."""
+        with self._lock:
+            now = time.monotonic()
+            credential.in_flight -= 1
+            if headers is not None:
+                limit_requests = _parse_int(headers.get("x-ratelimit-limit-requests"))
+                limit_tokens = _parse_int(headers.get("x-ratelimit-limit-tokens"))
+                remaining_requests = _parse_int(headers.get("x-ratelimit-remaining-requests"))
+                remaining_tokens = _parse_int(headers.get("x-ratelimit-remaining-tokens"))
+                reset_requests = _parse_duration(headers.get("x-ratelimit-reset-requests"))
+                reset_tokens = _parse_duration(headers.get("x-ratelimit-reset-tokens"))
+                if limit_requests is not None:
+                    credential.limit_requests = limit_requests
+                if limit_tokens is not None:
+                    credential.limit_tokens = limit_tokens
+                if remaining_requests is not None:
+                    credential.remaining_requests = remaining_requests
+                    credential.requests_reset_at = now + (reset_requests or 0.0)
+                if remaining_tokens is not None:
+                    credential.remaining_tokens = remaining_tokens
+                    credential.tokens_reset_at = now + (reset_tokens or 0.0)
+            if rate_limited:
+                retry_after = None
+                if headers is not None:
+                    retry_after = _parse_duration(headers.get("retry-after"))
+                    resets = [
+                        _parse_duration(headers.get("x-ratelimit-reset-requests")),
+                        _parse_duration(headers.get("x-ratelimit-reset-tokens")),
+                    ]
+                    retry_after = retry_after or max([r for r in resets if r is not None], default=None)
+                # Without any reset hint, back off for a second.
+                credential.parked_until = now + (max(retry_after, 0.05) if retry_after is not None else 1.0)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return a snapshot of every pooled key's accounting, without the keys themselves."""
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "name": c.name,
+                    "headroom": round(c.headroom(now), 3),
+                    "remaining_requests": c.remaining_requests,
+                    "remaining_tokens": c.remaining_tokens,
+                    "in_flight": c.in_flight,
+                    "parked_for": round(max(0.0, c.parked_until - now), 3),
+                }
+                for c in self._credentials
+            ]
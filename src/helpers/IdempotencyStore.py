@@ -0,0 +1,94 @@
+"""In-memory store for idempotency keys with in-flight request coalescing."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from src.utils.Logger import Logger
+
+
+class IdempotencyKeyConflict(Exception):
+    """Raised when a key is reused with a different request body."""
+
+
+class IdempotencyStore:
+    """Remembers the result of each request made with an idempotency key.
+
+    A repeated key returns the stored result. A retry that arrives while the
+    original is still running awaits the same computation instead of starting
+    a new one. Finished entries are kept for ``ttl_seconds`` and at most
+    ``max_entries`` of them are retained (oldest evicted first). Failed
+    computations are forgotten so that the client can retry them.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 1000) -> None:
+        """Initialize the store.
+
+        Args:
+            ttl_seconds: How long a finished result is kept
+            max_entries: Maximum number of keys retained
+        """
+        self._logger = Logger()
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the result for ``key``, running ``compute`` only the first time.
+
+        Args:
+            key: Client supplied idempotency key, scoped by the caller
+            fingerprint: Identifies the request body the key was first used with
+            compute: Coroutine function producing the result
+
+        Raises:
+            IdempotencyKeyConflict: If the key was used with another fingerprint
+        """
+        self._evict()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry["fingerprint"] != fingerprint:
+                raise IdempotencyKeyConflict(
+                    "Idempotency key was already used with a different request"
+                )
+            self._logger.info(f"Replaying idempotent request {key}")
+            return await asyncio.shield(entry["task"])
+
+        # The computation runs as its own task so that a cancelled original
+        # request does not cancel the retries attached to it.
+        task = asyncio.ensure_future(compute())
+        self._entries[key] = {"fingerprint": fingerprint, "task": task, "finished_at": None}
+        task.add_done_callback(lambda done: self._on_done(key, done))
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: "asyncio.Future[Any]") -> None:
+        entry = self._entries.get(key)
+        if entry is None or entry["task"] is not task:
+            return
+        if task.cancelled() or task.exception() is not None:
+            del self._entries[key]
+        else:
+            entry["finished_at"] = time.monotonic()
+
+    def _evict(self) -> None:
+        """Drop expired results and trim the store to ``max_entries``.
+
+        In-flight entries are never evicted.
+        """
+        now = time.monotonic()
+        finished = [
+            key for key, entry in self._entries.items()
+            if entry["finished_at"] is not None
+        ]
+        # Leave room for the entry about to be added.
+        overflow = len(self._entries) - self._max_entries + 1
+        for key in finished:
+            if now - self._entries[key]["finished_at"] > self._ttl_seconds or overflow > 0:
+                del self._entries[key]
+                overflow -= 1
@@ -0,0 +1,223 @@
+"""Bounded background job queue with on-disk persistence."""
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.Logger import Logger
+from src.utils.Tracer import tracer
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobQueue:
+    """Runs jobs on a fixed pool of worker threads and persists every job as JSON.
+
+    Each job is stored as ``<store_dir>/<job_id>.json``. Jobs that were still
+    queued or running when the process stopped are re-queued on start-up, so
+    their payload must be JSON-serializable and enough to redo the work.
+    Finished jobs are kept for ``retention_seconds`` and then dropped from
+    memory and from disk. ``add_done_callback`` lets callers be notified
+    when a job finishes instead of polling ``get``.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], str],
+        store_dir: Path,
+        workers: int = 2,
+        max_depth: int = 100,
+        retention_seconds: float = 86400,
+    ) -> None:
+        """Initialize the queue, restore persisted jobs and start the workers.
+
+        Args:
+            handler: Function that turns a job payload into its result text
+            store_dir: Directory where job records are persisted
+            workers: Number of worker threads
+            max_depth: Maximum number of jobs waiting to be picked up
+            retention_seconds: How long finished jobs are kept after they finish
+        """
+        self._logger = Logger()
+        self._handler = handler
+        self._store_dir = Path(store_dir)
+        self._store_dir.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._max_depth = max_depth
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._retention_seconds = retention_seconds
+        # IDs of finished jobs, oldest first, so expired ones can be pruned cheaply.
+        self._finished: "deque[str]" = deque()
+        self._callbacks: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._lock = threading.Lock()
+        self._wait_times: List[float] = []
+        self._running = 0
+
+        self._restore()
+        for index in range(workers):
+            threading.Thread(
+                target=self._work, name=f"job-worker-{index}", daemon=True
+            ).start()
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        """Persist a new job and queue it.
+
+        Returns:
+            str: The job ID
+
+        Raises:
+            JobQueueFull: If the queue already holds ``max_depth`` jobs
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": self.QUEUED,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self._prune()
+            if self._queue.qsize() >= self._max_depth:
+                raise JobQueueFull("Job queue is full")
+            self._jobs[job_id] = job
+            self._persist(job)
+            self._queue.put(job_id)
+        self._logger.info(f"Queued job {job_id}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the job record, or None if the job is unknown."""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def add_done_callback(self, job_id: str, callback: Callable[[Dict[str, Any]], None]) -> bool:
+        """Call ``callback`` with a copy of the job record once the job has finished.
+
+        The callback runs on the worker thread that finished the job, or right
+        away on the calling thread if the job has already finished.
+
+        Returns:
+            bool: False if the job is unknown, True otherwise
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            if job["status"] not in (self.DONE, self.FAILED):
+                self._callbacks.setdefault(job_id, []).append(callback)
+                return True
+            job = dict(job)
+        callback(job)
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue depth and wait-time statistics."""
+        with self._lock:
+            waits = sorted(self._wait_times)
+            statuses = [job["status"] for job in self._jobs.values()]
+            running = self._running
+        return {
+            "queue_depth": self._queue.qsize(),
+            "running": running,
+            "done": statuses.count(self.DONE),
+            "failed": statuses.count(self.FAILED),
+            "wait_seconds_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_seconds_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            "wait_seconds_max": waits[-1] if waits else 0.0,
+        }
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                job["status"] = self.RUNNING
+                job["started_at"] = time.time()
+                self._wait_times.append(job["started_at"] - job["created_at"])
+                self._wait_times = self._wait_times[-1000:]
+                self._running += 1
+                self._persist(job)
+            try:
+                with tracer.trace("job", job_id=job_id):
+                    result = self._handler(job["payload"])
+                update = {"status": self.DONE, "result": result}
+            except Exception as e:
+                self._logger.exception(e)
+                update = {"status": self.FAILED, "error": str(e)}
+            with self._lock:
+                job.update(update, finished_at=time.time())
+                self._running -= 1
+                self._persist(job)
+                self._finished.append(job_id)
+                self._prune()
+                callbacks = self._callbacks.pop(job_id, [])
+                finished_job = dict(job)
+            for callback in callbacks:
+                try:
+                    callback(finished_job)
+                except Exception as e:
+                    self._logger.exception(e)
+            self._queue.task_done()
+
+    def _expired(self, job: Dict[str, Any], now: float) -> bool:
+        return job["status"] in (self.DONE, self.FAILED) and now - job["finished_at"] > self._retention_seconds
+
+    def _prune(self) -> None:
+        """Drop finished jobs older than the retention period. Must be called with the lock held."""
+        now = time.time()
+        while self._finished and self._expired(self._jobs[self._finished[0]], now):
+            job_id = self._finished.popleft()
+            del self._jobs[job_id]
+            (self._store_dir / f"{job_id}.json").unlink(missing_ok=True)
+
+    def _persist(self, job: Dict[str, Any]) -> None:
+        """Atomically write a job record to disk. Must be called with the lock held."""
+        path = self._store_dir / f"{job['id']}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(job, file)
+        os.replace(tmp_path, path)
+
+    def _restore(self) -> None:
+        """Load persisted jobs, re-queue the ones that never finished and delete expired ones."""
+        now = time.time()
+        finished = []
+        for path in self._store_dir.glob("*.json"):
+            try:
+                with open(path) as file:
+                    job = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                self._logger.error(f"Skipping unreadable job record {path}: {e}")
+                continue
+            if self._expired(job, now):
+                path.unlink(missing_ok=True)
+                continue
+            self._jobs[job["id"]] = job
+            if job["status"] in (self.DONE, self.FAILED):
+                finished.append(job)
+            elif job["status"] in (self.QUEUED, self.RUNNING):
+                job["status"] = self.QUEUED
+                job["started_at"] = None
+                self._queue.put(job["id"])
+                self._logger.info(f"Re-queued unfinished job {job['id']}")
+        finished.sort(key=lambda job: job["finished_at"])
+        self._finished.extend(job["id"] for job in finished)
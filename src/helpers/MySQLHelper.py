@@ -6,6 +6,8 @@ import mysql.connector
 from mysql.connector import Error as MySQLError
 from mysql.connector.cursor import MySQLCursor
 
+from src.utils.Tracer import tracer
+
 
 class MySQLHelper:
     """Helper class for MySQL database operations."""
@@ -80,7 +82,7 @@ class MySQLHelper:
             List of dictionaries containing query results, or None if query fails
         """
         try:
-            with self._get_cursor(dictionary=True) as cursor:
+            with tracer.span("MySQLHelper.fetch_query"), self._get_cursor(dictionary=True) as cursor:
                 cursor.execute(query)
                 return cursor.fetchall()
         except MySQLError as e:
@@ -105,7 +107,7 @@ class MySQLHelper:
             bool: True if successful, False if error, None if duplicate entry
         """
         try:
-            with self._get_cursor() as cursor:
+            with tracer.span("MySQLHelper.execute_query"), self._get_cursor() as cursor:
                 if params:
                     cursor.execute(query, params)
                 else:
@@ -1,11 +1,20 @@
 # Standard library imports
-import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from datetime import date
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
+from src.helpers.CredentialPool import CredentialPool
 from src.utils.Logger import Logger
+from src.utils.Tracer import tracer
 
 # Third-party imports
-from openai import OpenAI
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+
+class _HedgeAborted(Exception):
+    """Raised in the losing call of a hedged completion once it has been aborted."""
 
 
 class AIHelper:
@@ -20,9 +29,271 @@ class AIHelper:
         """
         self._logger = Logger()
         self._config = config
-        os.environ["OPENAI_API_KEY"] = self._config["openai"]["credentials"]["default"]
-        self.client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+        # Calls are spread over the configured API keys by headroom.
+        self._pool = CredentialPool(self._config)
+
+        # Optional request hedging, configured under config['openai']['hedging'].
+        self._hedging = self._config["openai"].get("hedging", {})
+        self._hedging_enabled = bool(self._hedging.get("enabled", False))
+        self._latencies = deque(maxlen=self._hedging.get("window", 200))
+        self._hedge_decisions = deque(maxlen=self._hedging.get("window", 200))
+        self._stats_lock = threading.Lock()
+        self._hedges_in_flight = 0
+        self._hedges_aborted = 0
+
+    def _acquire_credential(self, credential_name=None):
+        """Reserve a key from the pool, sleeping until it is usable if every key is exhausted.
+
+        The reservation is given back while sleeping, so a waiting call does
+        not count against the key's request budget. Blocking: call it from
+        worker threads only.
+        """
+        while True:
+            credential, wait_seconds = self._pool.acquire(credential_name)
+            if not wait_seconds:
+                return credential
+            self._pool.cancel(credential)
+            time.sleep(wait_seconds)
+
+    def _call_with_pool(self, credential_name=None, on_send=None, **kwargs):
+        """Call the chat completions API on the key with the most headroom.
+
+        The key's rate-limit headers are fed back to the pool. On a 429 the key
+        is parked and the call is retried on the next best key; once every key
+        has been tried, one last attempt waits for the soonest reset.
+        Connection errors and 5xx responses are retried the same way, without
+        parking the key (the clients themselves never retry).
+        ``on_send`` is called right before each request goes out.
+
+        This is synchronous and may sleep while keys are rate limited, like
+        the OpenAI client call itself; the app runs it through
+        ``asyncio.to_thread`` and must never call it on the event loop.
+
+        Returns:
+            The raw API response; call ``.parse()`` for the completion (or stream).
+        """
+        attempts = 2 if credential_name else len(self._pool) + 1
+        for attempt in range(attempts):
+            credential = self._acquire_credential(credential_name)
+            if on_send:
+                on_send()
+            try:
+                raw = credential.client.chat.completions.with_raw_response.create(**kwargs)
+            except RateLimitError as e:
+                self._pool.release(credential, e.response.headers, rate_limited=True)
+                self._logger.error(f"Rate limited on credential '{credential.name}'")
+                if attempt == attempts - 1:
+                    raise
+                continue
+            except (APIConnectionError, InternalServerError) as e:
+                self._pool.release(credential)
+                self._logger.error(f"OpenAI call failed on credential '{credential.name}': {e}")
+                if attempt == attempts - 1:
+                    raise
+                continue
+            except Exception:
+                self._pool.release(credential)
+                raise
+            self._pool.release(credential, raw.headers)
+            return raw
+
+    def _create_completion(self, model, prompt, temperature, n, credential_name=None, on_send=None):
+        """Call the chat completions API and record the observed latency.
+
+        Latency is measured from when the request is sent, so time spent
+        waiting for a rate-limited key does not inflate the hedge delay.
+        """
+        sent_at = []
+
+        def mark_sent():
+            sent_at[:] = [time.perf_counter()]
+            if on_send:
+                on_send()
+
+        with tracer.span("openai.chat.completions", model=model) as span:
+            response = self._call_with_pool(
+                credential_name,
+                mark_sent,
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=1025,
+                temperature=temperature,
+                n=n,
+                stop=None,
+            ).parse()
+            if response.usage:
+                span.set("total_tokens", response.usage.total_tokens)
+        with self._stats_lock:
+            self._latencies.append(time.perf_counter() - sent_at[0])
+        return response
+
+    def _stream_completion(self, model, prompt, temperature, credential_name=None, on_send=None, abort=None) -> str:
+        """Stream a completion, record the observed latency and return its text.
+
+        Hedged calls are streamed so that the loser can be aborted: once
+        ``abort`` is set, the stream is closed at the next chunk, which stops
+        generation (and billing) upstream, and ``_HedgeAborted`` is raised.
+        The credential pool slot is already released when the response
+        headers arrive.
+        """
+        sent_at = []
+
+        def mark_sent():
+            sent_at[:] = [time.perf_counter()]
+            if on_send:
+                on_send()
+
+        with tracer.span("openai.chat.completions", model=model, stream=True) as span:
+            stream = self._call_with_pool(
+                credential_name,
+                mark_sent,
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=1025,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+            ).parse()
+            parts = []
+            try:
+                for chunk in stream:
+                    if abort is not None and abort.is_set():
+                        span.set("aborted", True)
+                        with self._stats_lock:
+                            self._hedges_aborted += 1
+                        raise _HedgeAborted()
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                    if chunk.usage:
+                        span.set("total_tokens", chunk.usage.total_tokens)
+            finally:
+                stream.close()
+        with self._stats_lock:
+            self._latencies.append(time.perf_counter() - sent_at[0])
+        return "".join(parts)
+
+    def _start_completion(self, *args) -> Future:
+        """Run ``_stream_completion`` on a thread of its own and return its future.
+
+        Each call gets a dedicated thread rather than a slot in a shared pool,
+        so hedging never limits how many completions run at once.
+        """
+        future: Future = Future()
+        run_completion = tracer.wrap(self._stream_completion)
+
+        def run():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(run_completion(*args))
+            except BaseException as e:
+                future.set_exception(e)
 
+        threading.Thread(target=run, name="ai-completion", daemon=True).start()
+        return future
+
+    def _hedge_delay(self) -> float:
+        """Return how long to wait for the primary call before hedging.
+
+        The delay is the configured percentile of recently observed latencies,
+        never lower than ``min_delay`` seconds.
+        """
+        min_delay = self._hedging.get("min_delay", 1.0)
+        with self._stats_lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self._hedging.get("min_samples", 20):
+            return max(min_delay, self._hedging.get("initial_delay", min_delay))
+        percentile = self._hedging.get("percentile", 95)
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return max(min_delay, samples[index])
+
+    def _reserve_hedge(self) -> bool:
+        """Record whether this call is hedged and reserve a hedge slot if so.
+
+        A hedge is fired only if it keeps the hedged fraction of recent calls
+        under ``max_hedge_rate`` and fewer than ``max_concurrent_hedges`` hedges
+        are already running.
+        """
+        max_rate = self._hedging.get("max_hedge_rate", 0.05)
+        max_concurrent = self._hedging.get("max_concurrent_hedges", 8)
+        with self._stats_lock:
+            total = len(self._hedge_decisions) + 1
+            hedged = sum(self._hedge_decisions) + 1
+            allowed = hedged / total <= max_rate and self._hedges_in_flight < max_concurrent
+            self._hedge_decisions.append(allowed)
+            if allowed:
+                self._hedges_in_flight += 1
+        return allowed
+
+    def _release_hedge(self, _future=None) -> None:
+        with self._stats_lock:
+            self._hedges_in_flight -= 1
+
+    def _create_hedged_completion(self, model, prompt, temperature) -> str:
+        """Run a completion, firing a duplicate if the primary is slow, and return its text.
+
+        The hedge timer starts when the primary request is actually sent. The
+        first successful response wins and the loser is aborted as soon as
+        its stream delivers the next chunk. A loser still waiting for its
+        response headers cannot be interrupted on the synchronous client; it
+        is closed as soon as they arrive.
+        """
+        sent = threading.Event()
+        primary_abort = threading.Event()
+        primary = self._start_completion(model, prompt, temperature, None, sent.set, primary_abort)
+        primary.add_done_callback(lambda _: sent.set())
+        sent.wait()
+        done, _ = wait([primary], timeout=self._hedge_delay())
+        if done:
+            # Calls that finish in time count towards the hedge rate too.
+            with self._stats_lock:
+                self._hedge_decisions.append(False)
+            return primary.result()
+        if not self._reserve_hedge():
+            return primary.result()
+
+        hedge_model = self._hedging.get("model") or model
+        self._logger.info(f"Primary completion is slow, hedging with model {hedge_model}")
+        # The pool steers the hedge to the key with the most headroom, unless
+        # a specific credential is configured for hedges.
+        hedge_abort = threading.Event()
+        hedge = self._start_completion(
+            hedge_model, prompt, temperature, self._hedging.get("credential"), None, hedge_abort
+        )
+        hedge.add_done_callback(self._release_hedge)
+
+        aborts = {primary: primary_abort, hedge: hedge_abort}
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        aborts[loser].set()
+                    if future is hedge:
+                        self._logger.info("Hedged completion won")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def credential_stats(self):
+        """Return per-key rate-limit accounting for monitoring."""
+        return self._pool.stats()
+
+    def hedging_stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the hedging counters for monitoring."""
+        with self._stats_lock:
+            decisions = len(self._hedge_decisions)
+            hedged = sum(self._hedge_decisions)
+            aborted = self._hedges_aborted
+        return {
+            "enabled": self._hedging_enabled,
+            "requests": decisions,
+            "hedged": hedged,
+            "aborted": aborted,
+            "hedge_rate": hedged / decisions if decisions else 0.0,
+            "hedge_delay": self._hedge_delay() if self._hedging_enabled else None,
+        }
 
     def genrate_from_prompt(self, model, prompt, temperature=0, n=1) -> str:
         """
@@ -41,30 +312,59 @@ class AIHelper:
 
         Process:
             1. The OpenAI API is called using the specified `model`, `prompt`, and optional parameters like `temperature` and `n`.
+               When hedging is enabled and the call is slower than the hedge delay, a duplicate call is fired, the first
+               response wins and the other call is aborted (hedged calls are streamed so that they can be aborted).
             2. A maximum of 1025 tokens are generated in the completion.
             3. The first generated response is logged, along with total token usage for the request.
             4. The function returns the list of response choices if successful.
             5. If an error occurs during the API call, the error is logged, and the function returns False.
         """
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1025,
-                temperature=temperature,
-                n=n,
-                stop=None,
-            )
-            self._logger.info(
-                f"Response Created: {str(response.choices[0].message.content)}"
-            )
-            if response.usage:
-                self._logger.critical(f"Total Token {response.usage.total_tokens}")
-            if response.choices[0].message.content:
-                return response.choices[0].message.content
+            # Hedged calls are streamed so the loser can be aborted, which
+            # only works for a single choice.
+            hedged = self._hedging_enabled and n == 1
+            with tracer.span("AIHelper.genrate_from_prompt", model=model, hedging=hedged):
+                if hedged:
+                    content = self._create_hedged_completion(model, prompt, temperature)
+                else:
+                    response = self._create_completion(model, prompt, temperature, n)
+                    content = response.choices[0].message.content
+                    if response.usage:
+                        self._logger.critical(f"Total Token {response.usage.total_tokens}")
+            self._logger.info(f"Response Created: {str(content)}")
+            if content:
+                return content
             else:
                 return ""
         except Exception as e:
             self._logger.critical("Not able to genrate answer")
             self._logger.exception(e)
             return ""
+
+    def stream_from_prompt(self, model, prompt, temperature=0) -> Iterator[str]:
+        """
+        Streams a response for the given prompt from the OpenAI API, chunk by chunk.
+
+        Args:
+            model (str): The model identifier to use for generating responses.
+            prompt (str): The input text guiding the generation process.
+            temperature (float, optional): A parameter controlling the randomness of the output (default is 0).
+
+        Yields:
+            str: Pieces of the generated text as they arrive. If an error occurs the error
+            is logged and the stream simply ends. Streamed calls are never hedged.
+        """
+        try:
+            stream = self._call_with_pool(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=1025,
+                temperature=temperature,
+                stream=True,
+            ).parse()
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            self._logger.critical("Not able to stream answer")
+            self._logger.exception(e)
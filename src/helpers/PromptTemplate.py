@@ -132,4 +132,29 @@ Based ONLY on the answers provided, create a strategic, 4-part essay outline. Th
 - The tone should be strategic, encouraging, and clear.
 - Do not include any introductory text. Begin directly with the title of the outline.
         """
-        return prompt
\ No newline at end of file
+        return prompt
+
+    def generate_essay_title_prompt(self, essay_prompt: str, answer_1: str, answer_3: str) -> str:
+        """
+        Generates a prompt to create a short working title for the essay.
+        Args:
+            essay_prompt (str): The original essay prompt the student is working on.
+            answer_1 (str): The student's answer about their "snapshot moment".
+            answer_3 (str): The student's answer about their "future blueprint".
+        Returns:
+            str: A prompt for the LLM to generate the essay title.
+        """
+        prompt = f"""
+You are an expert college essay coach. Suggest one short, memorable working title for a student's essay responding to the prompt: "{essay_prompt}"
+
+**The student's story:**
+"{answer_1}"
+
+**The student's goal at college:**
+"{answer_3}"
+
+**Instructions:**
+- The output must be ONLY the title itself, without quotes.
+- Keep it under 10 words.
+        """
+        return prompt
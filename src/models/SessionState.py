@@ -0,0 +1,45 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
+@dataclass(slots=True)
+class SessionState:
+    """Compact record of a single brainstorming session.
+
+    Holds only plain strings, lists and dicts so that it can be serialized
+    cheaply with ``to_dict``/``from_dict`` (e.g. to JSON or a database row).
+    """
+    flow: str = "personal_statement"
+    stage: str = "AWAITING_USER_DETAILS"
+    user_details: Dict[str, str] = field(default_factory=dict)
+    questions: List[str] = field(default_factory=list)
+    answers: List[str] = field(default_factory=list)
+
+    def reset(self, flow: str, stage: str = "AWAITING_USER_DETAILS") -> None:
+        """Clears the record in place so that callers holding it see the reset."""
+        self.flow = flow
+        self.stage = stage
+        self.user_details = {}
+        self.questions = []
+        self.answers = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the state as a JSON-serializable dictionary."""
+        return {
+            "flow": self.flow,
+            "stage": self.stage,
+            "user_details": dict(self.user_details),
+            "questions": list(self.questions),
+            "answers": list(self.answers),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionState":
+        """Rebuilds a state previously produced by ``to_dict``."""
+        return cls(
+            flow=data.get("flow", "personal_statement"),
+            stage=data.get("stage", "AWAITING_USER_DETAILS"),
+            user_details=dict(data.get("user_details", {})),
+            questions=list(data.get("questions", [])),
+            answers=list(data.get("answers", [])),
+        )
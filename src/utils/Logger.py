@@ -1,6 +1,8 @@
 import logging
+import time
 from pathlib import Path
 from datetime import date
+from src.utils.Tracer import tracer
 class Logger:
     def __init__(self):
         current_dir = Path(__file__).parent
@@ -8,17 +10,25 @@ class Logger:
         logFileName = "error-" + str(date.today().strftime("%Y-%m-%d")) + ".log"
         logging.basicConfig(filename=self.project_root / "logs" / logFileName,format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S',level=logging.INFO)
 
+    def _log(self, log_fn, message):
+        # Inside a sampled trace, time spent logging is added to the active span.
+        if not tracer.active():
+            return log_fn(message)
+        started = time.perf_counter()
+        log_fn(message)
+        tracer.add_time("log_seconds", time.perf_counter() - started)
+
     def error(self,message):
-        logging.error(message)
+        self._log(logging.error, message)
     
     def exception(self,e):
-        logging.exception(e)
+        self._log(logging.exception, e)
 
     def critical(self,message):
-        logging.critical(message)
+        self._log(logging.critical, message)
 
     def info(self,message):
-        logging.info(message)
+        self._log(logging.info, message)
 
     def debug(self,message):
-        logging.debug(message)
\ No newline at end of file
+        self._log(logging.debug, message)
\ No newline at end of file
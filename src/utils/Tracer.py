@@ -0,0 +1,186 @@
+"""Lightweight request tracing with nested spans and local exporters."""
+
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar, copy_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class _Trace:
+    """Collects the finished spans of one trace."""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self) -> None:
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """A timed operation within a trace. Use it through ``Tracer.span``."""
+
+    __slots__ = ("name", "attributes", "span_id", "parent", "trace", "tracer", "start", "duration", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["Span"], tracer: "Tracer") -> None:
+        self.name = name
+        self.attributes = attributes
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent = parent
+        self.trace = parent.trace if parent else _Trace()
+        # The tracer that started the trace exports it.
+        self.tracer = parent.tracer if parent else tracer
+        self.start = 0.0
+        self.duration = 0.0
+        self._token = None
+
+    def set(self, key: str, value: Any) -> None:
+        """Set an attribute on the span."""
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.attributes["error"] = repr(exc)
+        self.trace.spans.append(self)
+        if self.parent is None:
+            self.tracer._export(self)
+
+
+class _NoopSpan:
+    """Returned when the current request is not being traced."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class RingBufferExporter:
+    """Keeps the most recent traces in memory."""
+
+    def __init__(self, capacity: int = 200) -> None:
+        self._traces: deque = deque(maxlen=capacity)
+
+    def export(self, record: Dict[str, Any]) -> None:
+        self._traces.append(record)
+
+    def slowest(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return the slowest of the buffered traces, slowest first."""
+        return sorted(list(self._traces), key=lambda record: record["duration_ms"], reverse=True)[:limit]
+
+
+class JsonlExporter:
+    """Appends each trace as one JSON line to a file."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]) -> None:
+        with self._lock, open(self._path, "a") as file:
+            file.write(json.dumps(record, default=str) + "\n")
+
+
+class Tracer:
+    """Creates spans and hands finished, sampled traces to the exporters.
+
+    A trace is only recorded when its root span is sampled. Spans opened
+    outside a sampled trace are a shared no-op object, so instrumentation
+    costs a single context-variable lookup when sampling is off. Context is
+    carried by ``contextvars``, so it follows asyncio tasks and
+    ``asyncio.to_thread``; use ``Tracer.wrap`` for other thread pools.
+    """
+
+    def __init__(self, sample_rate: float = 0.0) -> None:
+        self.sample_rate = sample_rate
+        self.exporters: List[Any] = []
+
+    def configure(self, sample_rate: float, exporters: List[Any]) -> None:
+        """Set the sampling rate (0.0 - 1.0) and the exporters."""
+        self.sample_rate = sample_rate
+        self.exporters = exporters
+
+    def trace(self, name: str, **attributes: Any):
+        """Start a new trace (subject to sampling), or a child span if one is active."""
+        parent = _current_span.get()
+        if parent is not None:
+            return Span(name, attributes, parent, self)
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return _NOOP_SPAN
+        return Span(name, attributes, None, self)
+
+    def span(self, name: str, **attributes: Any):
+        """Open a child span of the active span; a no-op outside a sampled trace."""
+        parent = _current_span.get()
+        if parent is None:
+            return _NOOP_SPAN
+        return Span(name, attributes, parent, self)
+
+    def add_time(self, key: str, seconds: float) -> None:
+        """Accumulate a duration attribute (e.g. time spent logging) on the active span."""
+        span = _current_span.get()
+        if span is not None:
+            span.attributes[key] = span.attributes.get(key, 0.0) + seconds
+
+    @staticmethod
+    def active() -> bool:
+        """Return True if the current context is inside a sampled trace."""
+        return _current_span.get() is not None
+
+    @staticmethod
+    def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Bind ``fn`` to a copy of the current context, for use with thread pools."""
+        context = copy_context()
+        return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+    def _export(self, root: Span) -> None:
+        spans = sorted(root.trace.spans, key=lambda span: span.start)
+        record = {
+            "trace_id": root.trace.trace_id,
+            "name": root.name,
+            "timestamp": time.time(),
+            "duration_ms": round(root.duration * 1000, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent.span_id if span.parent else None,
+                    "offset_ms": round((span.start - root.start) * 1000, 3),
+                    "duration_ms": round(span.duration * 1000, 3),
+                    "attributes": span.attributes,
+                }
+                for span in spans
+            ],
+        }
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception:
+                # Tracing must never break the request being traced.
+                pass
+
+
+tracer = Tracer()
@@ -0,0 +1,57 @@
+import asyncio
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Logger writes to <project root>/logs, which must exist.
+(PROJECT_ROOT / "logs").mkdir(exist_ok=True)
+
+from mock_openai import FakeLLM  # noqa: E402
+from src.config.ConfigHelper import ConfigHelper  # noqa: E402
+from src.helpers.IdempotencyStore import IdempotencyStore  # noqa: E402
+from src.helpers.OpenAIHelper import AIHelper  # noqa: E402
+
+TEST_CONFIG = {
+    "openai": {"credentials": {"default": "sk-test"}, "models": {"default": "test-model"}},
+}
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The FastAPI app module, imported against a test config instead of config.json."""
+    config = {**TEST_CONFIG, "jobs": {"store_dir": str(tmp_path_factory.mktemp("jobs"))}}
+
+    def load_test_config(self):
+        self.config = copy.deepcopy(config)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(ConfigHelper, "__init__", load_test_config)
+        import app
+    return app
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Replaces the OpenAI calls made by every AIHelper with a FakeLLM."""
+    llm = FakeLLM()
+    monkeypatch.setattr(AIHelper, "genrate_from_prompt", lambda self, *args, **kwargs: llm.generate(*args, **kwargs))
+    monkeypatch.setattr(AIHelper, "stream_from_prompt", lambda self, *args, **kwargs: llm.stream(*args, **kwargs))
+    return llm
+
+
+@pytest.fixture
+def app_client(app_module, fake_llm, monkeypatch):
+    """A TestClient for the app with a fresh session, session lock and idempotency store."""
+    from fastapi.testclient import TestClient
+
+    app_module.answer_generator.reset_state()
+    monkeypatch.setattr(app_module, "idempotency_store", IdempotencyStore())
+    # Each test runs on its own event loop, which an asyncio.Lock must not outlive.
+    monkeypatch.setattr(app_module, "session_lock", asyncio.Lock())
+    with TestClient(app_module.app) as client:
+        yield client
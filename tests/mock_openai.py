@@ -0,0 +1,167 @@
+"""Local stand-in for the OpenAI client, with injectable latency and rate limits."""
+
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+from openai import RateLimitError
+
+
+class FakeRawResponse:
+    def __init__(self, headers, parsed):
+        self.headers = headers
+        self._parsed = parsed
+
+    def parse(self):
+        return self._parsed
+
+
+class FakeStream:
+    """A streamed completion: the client's name arrives in ``steps`` chunks spread
+    over ``latency`` seconds, and ``close`` aborts it early like the real Stream."""
+
+    def __init__(self, client, latency, steps=5):
+        self.client = client
+        self.latency = latency
+        self.steps = steps
+        self.closed = False
+        self.exhausted = False
+        self._finished = False
+
+    def __iter__(self):
+        try:
+            for step in range(self.steps):
+                time.sleep(self.latency / self.steps)
+                if self.closed:
+                    return
+                content = self.client.name if step == 0 else None
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+            self.exhausted = True
+            yield SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=7))
+        finally:
+            self._finish()
+
+    def close(self):
+        self.closed = True
+        self._finish()
+
+    def _finish(self):
+        with self.client._lock:
+            if self._finished:
+                return
+            self._finished = True
+            self.client.concurrent -= 1
+            if not self.exhausted:
+                self.client.aborted += 1
+
+
+class FakeOpenAIClient:
+    """Mimics ``OpenAI().chat.completions.with_raw_response.create``.
+
+    Args:
+        name: Text returned as the completion, to tell keys apart
+        latency: Seconds each call takes
+        slow_latency: Seconds a call takes when it is chosen to be slow
+        slow_probability: Chance that a call is slow
+        limit: Requests allowed per ``window`` seconds (None for unlimited);
+            further calls get a 429 with x-ratelimit headers, like the real API
+        window: Length of the rate-limit window in seconds
+        seed: Seed for the slow-call random generator
+    """
+
+    def __init__(self, name="ok", latency=0.0, slow_latency=0.0, slow_probability=0.0,
+                 limit=None, window=1.0, seed=0):
+        self.name = name
+        self.latency = latency
+        self.slow_latency = slow_latency
+        self.slow_probability = slow_probability
+        self.limit = limit
+        self.window = window
+        self.calls = 0
+        self.rate_limited = 0
+        self.aborted = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(with_raw_response=SimpleNamespace(create=self.create))
+        )
+
+    def _rate_limit_headers(self, now):
+        reset_ms = max(1, int((self._window_start + self.window - now) * 1000) + 1)
+        return {
+            "x-ratelimit-limit-requests": str(self.limit),
+            "x-ratelimit-remaining-requests": str(max(0, self.limit - self._window_count)),
+            "x-ratelimit-reset-requests": f"{reset_ms}ms",
+        }
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            headers = {}
+            if self.limit is not None:
+                now = time.monotonic()
+                if now - self._window_start >= self.window:
+                    self._window_start, self._window_count = now, 0
+                if self._window_count >= self.limit:
+                    self.rate_limited += 1
+                    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+                    response = httpx.Response(429, headers=self._rate_limit_headers(now), request=request)
+                    raise RateLimitError("Rate limit reached", response=response, body=None)
+                self._window_count += 1
+                headers = self._rate_limit_headers(now)
+            slow = self._random.random() < self.slow_probability
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        latency = self.slow_latency if slow else self.latency
+        if kwargs.get("stream"):
+            # Streams take their time while the chunks are read.
+            return FakeRawResponse(headers, FakeStream(self, latency))
+        try:
+            time.sleep(latency)
+        finally:
+            with self._lock:
+                self.concurrent -= 1
+
+        message = SimpleNamespace(content=self.name)
+        return FakeRawResponse(headers, SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None))
+
+
+def use_fake_clients(pool, **clients):
+    """Swap the OpenAI clients of a CredentialPool for fakes, by credential name."""
+    for name, client in clients.items():
+        pool.get(name).client = client
+
+
+class FakeLLM:
+    """Stand-in for ``AIHelper.genrate_from_prompt`` / ``stream_from_prompt``.
+
+    Every call returns a distinct ``"Reply <n>"`` after ``delay`` seconds and
+    records its prompt, so tests can count LLM calls and tell replies apart.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self):
+        return len(self.prompts)
+
+    def generate(self, model, prompt, temperature=0, n=1):
+        with self._lock:
+            self.prompts.append(prompt)
+            reply = f"Reply {len(self.prompts)}"
+        time.sleep(self.delay)
+        return reply
+
+    def stream(self, model, prompt, temperature=0):
+        reply = self.generate(model, prompt, temperature)
+        yield reply[:3]
+        yield reply[3:]
@@ -0,0 +1,86 @@
+import pytest
+
+from src.helpers.AnswerClassifier import LowEffortClassifier
+from src.helpers.AnswerValidator import AnswerValidator
+
+
+REAL_ANSWERS = [
+    "Leading robotics team, building autonomous drones, winning regional championship",
+    "MIT CSAIL NLP research internship summer 2023",
+    "Volunteered weekends teaching coding, built HTML CSS curriculum, mentored twelve students",
+    "Grandmother's bakery: early mornings, kneading dough, learning patience",
+    "I rebuilt the robotics club after our mentor left and taught the new members to solder.",
+    "Ayudé a mi abuela en su panadería todos los fines de semana.",
+]
+LOW_EFFORT_ANSWERS = [
+    "I don't know, nothing really comes to mind",
+    "Not sure, maybe something with my friends I guess",
+    "It was a really nice thing to do for me",
+]
+
+
+@pytest.mark.parametrize("answer", REAL_ANSWERS)
+def test_accepts_real_answers(answer):
+    assert AnswerValidator().check(answer) is None
+
+
+@pytest.mark.parametrize("answer", REAL_ANSWERS)
+def test_classifier_accepts_real_answers(answer):
+    assert AnswerValidator({"classifier": {"enabled": True}}).check(answer) is None
+
+
+@pytest.mark.parametrize("answer", LOW_EFFORT_ANSWERS)
+def test_classifier_flags_low_effort_answers_when_enabled(answer):
+    assert AnswerValidator().check(answer) is None
+    validator = AnswerValidator({"classifier": {"enabled": True}})
+    assert validator.check(answer) == "classifier"
+
+
+def test_classifier_threshold_is_configurable():
+    answer = "It was a really nice thing to do for me"
+    assert 0.5 < LowEffortClassifier().score(answer) < 0.99
+    assert AnswerValidator({"classifier": {"enabled": True, "threshold": 0.99}}).check(answer) is None
+
+
+def test_explicit_classifier_replaces_the_configured_one():
+    validator = AnswerValidator({"classifier": {"enabled": True}}, classifier=lambda text: "drones" in text)
+    assert validator.validate("Leading robotics team, building autonomous drones") == (
+        "Could you expand on that with a specific example from your own experience?"
+    )
+    assert validator.check(LOW_EFFORT_ANSWERS[0]) is None
+
+
+@pytest.mark.parametrize("answer, reason", [
+    ("   ", "empty"),
+    ("robotics club", "too_short"),
+    ("asdf qwer zxcv hjkl", "gibberish"),
+    ("zxcv bnm qwrt plkj sdfg", "gibberish"),
+    ("@@@ ### !!! $$$ ok fine good", "gibberish"),
+    ("soooooooo fun fun fun", "repetitive"),
+    ("good good good good good good good good good", "repetitive"),
+    ("我在高中时领导了机器人团队并赢得了地区冠军", "language"),
+    ("Я руководил командой робототехники в школе", "language"),
+])
+def test_rejects_unusable_answers(answer, reason):
+    assert AnswerValidator().check(answer) == reason
+
+
+def test_rejects_repeated_previous_answer():
+    previous = ["I taught my younger brother to read during the lockdown."]
+    assert AnswerValidator().check(previous[0].upper(), previous) == "duplicate"
+
+
+def test_language_check_can_be_disabled():
+    validator = AnswerValidator({"check_language": False})
+    assert validator.check("Я руководил командой робототехники в школе") is None
+
+
+def test_validate_counts_avoided_llm_calls():
+    validator = AnswerValidator()
+    assert validator.validate("asdf qwer zxcv hjkl") is not None
+    assert validator.validate("Leading robotics team, building autonomous drones") is None
+    assert validator.stats() == {
+        "answers_checked": 2,
+        "llm_calls_avoided": 1,
+        "rejections": {"gibberish": 1},
+    }
@@ -0,0 +1,148 @@
+import json
+
+import pytest
+from fastapi import WebSocket
+from starlette.websockets import WebSocketDisconnect
+
+DETAILS = {"name": "Asha", "stream": "Engineering", "major": "Robotics", "college": "MIT"}
+ANSWERS = [
+    "I rebuilt the robotics club after our mentor left and taught the new members to solder.",
+    "I learned that people stay when they are trusted with real work and real decisions.",
+    "I want to start a repair workshop where students fix devices for local families.",
+]
+SUPPLEMENT_OUTLINE = "Excellent! Here is the structured outline for your supplemental essay"
+
+
+def test_start_session_selects_flow(app_client, app_module):
+    response = app_client.post("/start-session", json={**DETAILS, "flow": "community_supplement"})
+    assert response.status_code == 200
+    assert app_module.answer_generator.state.flow == "community_supplement"
+
+    for answer in ANSWERS:
+        reply = app_client.post("/chat", json={"message": answer}).json()
+    assert reply["is_complete"]
+    assert reply["response"].startswith(SUPPLEMENT_OUTLINE)
+
+
+def test_start_session_defaults_to_personal_statement(app_client, app_module):
+    app_module.answer_generator.reset_state(flow="community_supplement")
+    assert app_client.post("/start-session", json=DETAILS).status_code == 200
+    assert app_module.answer_generator.state.flow == "personal_statement"
+
+
+def test_start_session_rejects_unknown_flow(app_client, fake_llm):
+    response = app_client.post("/start-session", json={**DETAILS, "flow": "no_such_flow"})
+    assert response.status_code == 422
+    assert "no_such_flow" in response.text
+    assert fake_llm.calls == 0
+
+
+def receive_message(websocket):
+    """Skip token and stage frames until the final message frame of a turn."""
+    while True:
+        frame = websocket.receive_json()
+        if frame["type"] == "message":
+            return frame
+
+
+def test_websocket_start_frame_selects_flow(app_client):
+    with app_client.websocket_connect("/ws/chat") as websocket:
+        websocket.send_json({"type": "start", **DETAILS, "flow": "no_such_flow"})
+        assert websocket.receive_json()["type"] == "error"
+
+        websocket.send_json({"type": "start", **DETAILS, "flow": "community_supplement"})
+        assert not receive_message(websocket)["is_complete"]
+        for answer in ANSWERS:
+            websocket.send_json({"type": "answer", "message": answer})
+            reply = receive_message(websocket)
+        assert reply["is_complete"]
+        assert reply["response"].startswith(SUPPLEMENT_OUTLINE)
+
+
+def test_job_events_push_the_finished_outline(app_client, fake_llm):
+    app_client.post("/start-session", json=DETAILS)
+    for answer in ANSWERS[:2]:
+        app_client.post("/chat", json={"message": answer})
+    fake_llm.delay = 0.2
+    job_id = app_client.post("/chat", json={"message": ANSWERS[2], "use_job": True}).json()["job_id"]
+    assert job_id
+
+    with app_client.stream("GET", f"/jobs/{job_id}/events") as response:
+        events = [line for line in response.iter_lines() if line.startswith("data: ")]
+
+    job = json.loads(events[0][len("data: "):])
+    assert job["status"] == "done"
+    assert job["is_complete"]
+    assert job["response"].startswith("Excellent! Here is the structured outline")
+    assert app_client.get("/jobs/unknown/events").status_code == 404
+
+
+def test_websocket_closes_with_internal_error_when_generation_fails(app_client, app_module, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("prompt template missing")
+
+    monkeypatch.setattr(app_module.answer_generator, "start_session", fail)
+    with app_client.websocket_connect("/ws/chat") as websocket:
+        websocket.send_json({"type": "start", **DETAILS})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1011
+
+
+def test_websocket_closes_with_internal_error_when_a_token_send_fails(app_client, app_module, monkeypatch):
+    original_send_json = WebSocket.send_json
+
+    async def send_json(self, data, *args, **kwargs):
+        if data.get("type") == "token":
+            raise RuntimeError("send failed")
+        await original_send_json(self, data, *args, **kwargs)
+
+    monkeypatch.setattr(WebSocket, "send_json", send_json)
+    with app_client.websocket_connect("/ws/chat") as websocket:
+        websocket.send_json({"type": "start", **DETAILS})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1011
+
+
+def test_failed_outline_job_reopens_the_session_for_a_retry(app_client, app_module, fake_llm, monkeypatch):
+    app_client.post("/start-session", json=DETAILS)
+    for answer in ANSWERS[:2]:
+        app_client.post("/chat", json={"message": answer})
+
+    def fail(state):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(app_module.answer_generator, "generate_stage", fail)
+    job_id = app_client.post("/chat", json={"message": ANSWERS[2], "use_job": True}).json()["job_id"]
+    with app_client.stream("GET", f"/jobs/{job_id}/events") as response:
+        job = json.loads(next(line for line in response.iter_lines() if line.startswith("data: "))[len("data: "):])
+    assert job["status"] == "failed"
+    assert app_module.answer_generator.conversation_stage == "AWAITING_ANSWER_3"
+    assert app_module.answer_generator.answers == ANSWERS[:2]
+
+    calls_before = fake_llm.calls
+    retry = app_client.post("/chat", json={"message": ANSWERS[2]}).json()
+    assert retry["is_complete"]
+    assert retry["response"].startswith("Excellent! Here is the structured outline")
+    assert fake_llm.calls == calls_before + 1
+
+
+def test_failed_outline_job_leaves_a_newer_session_alone(app_module, fake_llm):
+    generator = app_module.answer_generator
+    generator.start_session(**{"name": "Asha", "stream": "Engineering", "major": "Robotics", "college": "MIT"})
+    for answer in ANSWERS[:2]:
+        generator.chat(answer)
+    snapshot = generator.begin_final_stage(ANSWERS[2])
+
+    generator.start_session(name="Ravi", stream="Arts", major="History", college="Yale")
+
+    assert not generator.reopen_final_stage(snapshot)
+    assert generator.conversation_stage == "AWAITING_ANSWER_1"
+    assert generator.user_details["name"] == "Ravi"
+
+
+def test_hedging_metrics_are_exported(app_client):
+    stats = app_client.get("/metrics/hedging").json()
+    assert stats["enabled"] is False
+    assert {"requests", "hedged", "aborted", "hedge_rate", "hedge_delay"} <= set(stats)
@@ -0,0 +1,171 @@
+import threading
+import time
+
+import httpx
+
+from mock_openai import FakeOpenAIClient, use_fake_clients
+from src.helpers.CredentialPool import CredentialPool
+from src.helpers.OpenAIHelper import AIHelper
+
+
+def make_pool(*names):
+    return CredentialPool({"openai": {"credentials": {name: f"sk-{name}" for name in names}}})
+
+
+def limits(remaining, limit=100, reset="1s"):
+    return {
+        "x-ratelimit-limit-requests": str(limit),
+        "x-ratelimit-remaining-requests": str(remaining),
+        "x-ratelimit-reset-requests": reset,
+    }
+
+
+def completion(content):
+    """JSON body of a chat completion, as the API returns it."""
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "model",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    }
+
+
+def use_mock_transport(credential, handler):
+    """Route a real OpenAI client through ``handler``, keeping its own options (such as retries)."""
+    credential.client = credential.client.with_options(
+        http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+
+
+def in_flight(pool):
+    return {stats["name"]: stats["in_flight"] for stats in pool.stats()}
+
+
+def test_acquire_prefers_the_key_with_most_headroom():
+    pool = make_pool("a", "b", "c")
+    for name, remaining in (("a", 10), ("b", 90), ("c", 50)):
+        credential, _ = pool.acquire(name)
+        pool.release(credential, limits(remaining))
+
+    credential, wait_seconds = pool.acquire()
+    assert (credential.name, wait_seconds) == ("b", 0.0)
+    # Calls in flight count against a key's headroom.
+    for _ in range(45):
+        pool.acquire("b")
+    assert pool.acquire()[0].name == "c"
+
+
+def test_rate_limited_key_is_parked_until_reset():
+    pool = make_pool("a", "b")
+    credential, _ = pool.acquire("a")
+    pool.release(credential, {"x-ratelimit-reset-requests": "200ms"}, rate_limited=True)
+
+    for _ in range(3):
+        credential, wait_seconds = pool.acquire()
+        assert (credential.name, wait_seconds) == ("b", 0.0)
+        pool.release(credential, limits(99))
+    # A pinned key is still handed out, with the time left to wait.
+    credential, wait_seconds = pool.acquire("a")
+    assert 0.1 < wait_seconds <= 0.2
+    pool.cancel(credential)
+
+    time.sleep(0.25)
+    assert pool.acquire("a")[1] == 0.0
+
+
+def test_acquire_waits_for_the_soonest_reset_when_every_key_is_exhausted():
+    pool = make_pool("a", "b")
+    for name, reset in (("a", "300ms"), ("b", "100ms")):
+        credential, _ = pool.acquire(name)
+        pool.release(credential, {"x-ratelimit-reset-requests": reset}, rate_limited=True)
+
+    credential, wait_seconds = pool.acquire()
+    assert credential.name == "b"
+    assert 0.05 < wait_seconds <= 0.1
+
+
+def test_in_flight_accounting_is_consistent_across_threads():
+    pool = make_pool("a", "b", "c")
+    start = threading.Barrier(8)
+
+    def worker(index):
+        start.wait()
+        for attempt in range(500):
+            credential, _ = pool.acquire()
+            if attempt % 3 == 0:
+                pool.cancel(credential)
+            else:
+                pool.release(credential, limits(100 - attempt % 50), rate_limited=attempt % 97 == 0)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert in_flight(pool) == {"a": 0, "b": 0, "c": 0}
+
+
+def test_ai_helper_spreads_calls_over_rate_limited_keys():
+    helper = AIHelper({"openai": {"credentials": {"a": "sk-a", "b": "sk-b", "c": "sk-c"}}})
+    clients = {name: FakeOpenAIClient(name=name, limit=5, window=0.5) for name in ("a", "b", "c")}
+    use_fake_clients(helper._pool, **clients)
+
+    replies = [helper.genrate_from_prompt("model", "prompt") for _ in range(30)]
+
+    assert all(replies)
+    assert all(client.calls - client.rate_limited >= 5 for client in clients.values())
+    assert in_flight(helper._pool) == {"a": 0, "b": 0, "c": 0}
+
+
+def test_waiting_for_a_parked_key_does_not_hold_its_slot():
+    helper = AIHelper({"openai": {"credentials": {"a": "sk-a"}}})
+    use_fake_clients(helper._pool, a=FakeOpenAIClient(name="a"))
+    credential, _ = helper._pool.acquire("a")
+    helper._pool.release(credential, {"retry-after": "0.3"}, rate_limited=True)
+
+    replies = []
+    caller = threading.Thread(target=lambda: replies.append(helper.genrate_from_prompt("model", "prompt")))
+    caller.start()
+    time.sleep(0.1)
+    assert in_flight(helper._pool) == {"a": 0}
+    caller.join()
+
+    assert replies == ["a"]
+
+
+def test_rate_limited_key_is_swapped_without_sdk_retries():
+    helper = AIHelper({"openai": {"credentials": {"a": "sk-a", "b": "sk-b"}}})
+    hits = {"sk-a": 0, "sk-b": 0}
+
+    def handler(request):
+        key = request.headers["authorization"].removeprefix("Bearer ")
+        hits[key] += 1
+        if key == "sk-a":
+            return httpx.Response(429, headers={"retry-after": "1", **limits(0)}, json={"error": {"message": "slow down"}})
+        return httpx.Response(200, headers=limits(99), json=completion("from b"))
+
+    for name in ("a", "b"):
+        use_mock_transport(helper._pool.get(name), handler)
+    credential, _ = helper._pool.acquire("a")
+    helper._pool.release(credential, limits(100))
+
+    assert helper.genrate_from_prompt("model", "prompt") == "from b"
+    assert hits == {"sk-a": 1, "sk-b": 1}
+    assert helper._pool.stats()[0]["parked_for"] > 0.5
+
+
+def test_server_errors_are_retried_by_the_pool():
+    helper = AIHelper({"openai": {"credentials": {"a": "sk-a"}}})
+    responses = [httpx.Response(503, json={"error": {"message": "overloaded"}})]
+
+    def handler(request):
+        if responses:
+            return responses.pop()
+        return httpx.Response(200, json=completion("ok"))
+
+    use_mock_transport(helper._pool.get("a"), handler)
+
+    assert helper.genrate_from_prompt("model", "prompt") == "ok"
+    assert in_flight(helper._pool) == {"a": 0}
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.helpers.IdempotencyStore import IdempotencyKeyConflict, IdempotencyStore
+
+DETAILS = {"name": "Asha", "stream": "Engineering", "major": "Robotics", "college": "MIT"}
+ANSWER_1 = "I rebuilt the robotics club after our mentor left and taught the new members to solder."
+ANSWER_2 = "I learned that people stay when they are trusted with real work and real decisions."
+
+
+class Computation:
+    """Counts calls and returns a distinct result for each, after ``delay`` seconds."""
+
+    def __init__(self, delay=0.05, fail_first=False):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        if self.fail_first and call == 1:
+            raise RuntimeError("LLM unavailable")
+        return f"result {call}"
+
+
+def test_concurrent_retries_share_one_computation():
+    store, compute = IdempotencyStore(), Computation()
+
+    async def scenario():
+        return await asyncio.gather(*(store.run("key", "body", compute) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["result 1"] * 5
+    assert compute.calls == 1
+
+
+def test_key_reused_with_another_body_conflicts():
+    store, compute = IdempotencyStore(), Computation()
+
+    async def scenario():
+        original = asyncio.ensure_future(store.run("key", "body", compute))
+        await asyncio.sleep(0)
+        with pytest.raises(IdempotencyKeyConflict):
+            await store.run("key", "other body", compute)
+        await original
+        with pytest.raises(IdempotencyKeyConflict):
+            await store.run("key", "other body", compute)
+
+    asyncio.run(scenario())
+    assert compute.calls == 1
+
+
+def test_failed_computation_can_be_retried():
+    store, compute = IdempotencyStore(), Computation(fail_first=True)
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(store.run("key", "body", compute) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        return await store.run("key", "body", compute)
+
+    assert asyncio.run(scenario()) == "result 2"
+    assert compute.calls == 2
+
+
+def test_results_expire_after_ttl():
+    store, compute = IdempotencyStore(ttl_seconds=0.05), Computation(delay=0)
+
+    async def scenario():
+        first = await store.run("key", "body", compute)
+        assert await store.run("key", "body", compute) == first
+        time.sleep(0.1)
+        return await store.run("key", "body", compute)
+
+    assert asyncio.run(scenario()) == "result 2"
+
+
+def test_oldest_results_are_evicted_beyond_max_entries():
+    store, compute = IdempotencyStore(max_entries=2), Computation(delay=0)
+
+    async def scenario():
+        for key in ("a", "b", "c"):
+            await store.run(key, "body", compute)
+        return await store.run("c", "body", compute), await store.run("a", "body", compute)
+
+    assert asyncio.run(scenario()) == ("result 3", "result 4")
+
+
+async def post_concurrently(app_module, path, bodies, headers=None):
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.post(path, json=body, headers=headers) for body in bodies))
+
+
+def test_chat_retries_with_same_key_make_one_llm_call(app_client, app_module, fake_llm):
+    app_client.post("/start-session", json=DETAILS)
+    fake_llm.delay = 0.1
+    calls_before = fake_llm.calls
+
+    responses = asyncio.run(post_concurrently(
+        app_module, "/chat", [{"message": ANSWER_1}] * 5, headers={"Idempotency-Key": "retry-1"}
+    ))
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert len({response.json()["response"] for response in responses}) == 1
+    assert fake_llm.calls == calls_before + 1
+    assert app_module.answer_generator.answers == [ANSWER_1]
+
+
+def test_chat_key_reused_with_another_message_is_rejected(app_client):
+    app_client.post("/start-session", json=DETAILS)
+    headers = {"Idempotency-Key": "retry-2"}
+    assert app_client.post("/chat", json={"message": ANSWER_1}, headers=headers).status_code == 200
+    assert app_client.post("/chat", json={"message": ANSWER_2}, headers=headers).status_code == 422
+
+
+def test_concurrent_chat_requests_advance_the_session_one_at_a_time(app_client, app_module, fake_llm):
+    app_client.post("/start-session", json=DETAILS)
+    fake_llm.delay = 0.1
+
+    responses = asyncio.run(post_concurrently(
+        app_module, "/chat", [{"message": ANSWER_1}, {"message": ANSWER_2}]
+    ))
+
+    assert [response.status_code for response in responses] == [200, 200]
+    generator = app_module.answer_generator
+    assert generator.conversation_stage == "AWAITING_ANSWER_3"
+    assert sorted(generator.answers) == sorted([ANSWER_1, ANSWER_2])
+    assert len(set(generator.questions)) == 3
@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+
+from src.helpers.JobQueue import JobQueue
+
+
+def wait_for_job(jobs, job_id, timeout=5.0):
+    finished = threading.Event()
+    records = []
+    assert jobs.add_done_callback(job_id, lambda job: (records.append(job), finished.set()))
+    assert finished.wait(timeout)
+    return records[0]
+
+
+def write_record(store_dir, job_id, status, finished_at=None):
+    record = {
+        "id": job_id,
+        "status": status,
+        "payload": {"text": job_id},
+        "result": "old" if status == JobQueue.DONE else None,
+        "error": None,
+        "created_at": time.time() - 3600,
+        "started_at": None,
+        "finished_at": finished_at,
+    }
+    (store_dir / f"{job_id}.json").write_text(json.dumps(record))
+
+
+def test_done_callback_fires_once_on_completion(tmp_path):
+    release = threading.Event()
+    jobs = JobQueue(lambda payload: release.wait(5) and payload["text"].upper(), tmp_path, workers=1)
+    job_id = jobs.submit({"text": "outline"})
+
+    calls = []
+    assert jobs.add_done_callback(job_id, calls.append)
+    assert calls == []
+    release.set()
+    job = wait_for_job(jobs, job_id)
+
+    assert job["status"] == JobQueue.DONE
+    assert job["result"] == "OUTLINE"
+    assert len(calls) == 1 and calls[0]["status"] == JobQueue.DONE
+
+
+def test_done_callback_runs_immediately_for_finished_and_failed_jobs(tmp_path):
+    def handler(payload):
+        raise RuntimeError("LLM unavailable")
+
+    jobs = JobQueue(handler, tmp_path, workers=1)
+    job_id = jobs.submit({"text": "outline"})
+    assert wait_for_job(jobs, job_id)["status"] == JobQueue.FAILED
+
+    calls = []
+    assert jobs.add_done_callback(job_id, calls.append)
+    assert calls[0]["error"] == "LLM unavailable"
+    assert not jobs.add_done_callback("unknown", calls.append)
+
+
+def test_finished_jobs_are_pruned_after_retention(tmp_path):
+    jobs = JobQueue(lambda payload: "done", tmp_path, workers=1, retention_seconds=0.2)
+    old_id = jobs.submit({"text": "old"})
+    wait_for_job(jobs, old_id)
+    assert jobs.get(old_id) is not None
+    assert (tmp_path / f"{old_id}.json").exists()
+
+    time.sleep(0.3)
+    new_id = jobs.submit({"text": "new"})
+
+    assert jobs.get(old_id) is None
+    assert not (tmp_path / f"{old_id}.json").exists()
+    assert jobs.get(new_id) is not None
+
+
+def test_restore_deletes_expired_records_and_requeues_unfinished(tmp_path):
+    write_record(tmp_path, "expired", JobQueue.DONE, finished_at=time.time() - 7200)
+    write_record(tmp_path, "recent", JobQueue.DONE, finished_at=time.time() - 60)
+    write_record(tmp_path, "unfinished", JobQueue.RUNNING)
+
+    jobs = JobQueue(lambda payload: payload["text"].upper(), tmp_path, workers=1, retention_seconds=3600)
+
+    assert jobs.get("expired") is None
+    assert not (tmp_path / "expired.json").exists()
+    assert jobs.get("recent")["result"] == "old"
+    assert wait_for_job(jobs, "unfinished")["result"] == "UNFINISHED"
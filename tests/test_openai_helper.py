@@ -0,0 +1,101 @@
+import threading
+import time
+
+from mock_openai import FakeOpenAIClient, use_fake_clients
+from src.helpers.OpenAIHelper import AIHelper
+
+
+def make_helper(client, hedging=None):
+    helper = AIHelper({"openai": {"credentials": {"default": "sk-test"}, "hedging": hedging or {}}})
+    use_fake_clients(helper._pool, default=client)
+    return helper
+
+
+def timed_calls(helper, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        assert helper.genrate_from_prompt("model", "prompt")
+        latencies.append(time.perf_counter() - started)
+    return sorted(latencies)
+
+
+def p99(latencies):
+    return latencies[int(len(latencies) * 0.99) - 1]
+
+
+def test_hedging_shrinks_tail_latency():
+    slow = {"latency": 0.002, "slow_latency": 0.3, "slow_probability": 0.04, "seed": 7}
+    baseline = make_helper(FakeOpenAIClient(**slow))
+    hedged_client = FakeOpenAIClient(**slow)
+    hedged = make_helper(
+        hedged_client,
+        {"enabled": True, "min_delay": 0.02, "min_samples": 10, "max_hedge_rate": 0.1},
+    )
+
+    # Warm up the latency window with fast calls only.
+    hedged_client.slow_probability = 0.0
+    timed_calls(hedged, 20)
+    hedged_client.slow_probability = slow["slow_probability"]
+
+    baseline_latencies = timed_calls(baseline, 200)
+    hedged_latencies = timed_calls(hedged, 200)
+
+    assert p99(baseline_latencies) >= 0.3
+    assert p99(hedged_latencies) < 0.1
+    stats = hedged.hedging_stats()
+    assert stats["hedged"] > 0
+    assert stats["hedge_rate"] <= 0.1
+
+
+def test_hedge_rate_stays_under_cap_when_everything_is_slow():
+    client = FakeOpenAIClient(latency=0.03)
+    helper = make_helper(
+        client,
+        {"enabled": True, "min_delay": 0.005, "min_samples": 1000, "max_hedge_rate": 0.2},
+    )
+
+    timed_calls(helper, 30)
+
+    stats = helper.hedging_stats()
+    assert stats["hedged"] > 0
+    assert stats["hedge_rate"] <= 0.2
+    assert client.calls == 30 + stats["hedged"]
+
+
+def test_hedging_does_not_cap_concurrent_completions():
+    client = FakeOpenAIClient(latency=0.2)
+    helper = make_helper(client, {"enabled": True, "min_delay": 5.0})
+
+    threads = [threading.Thread(target=helper.genrate_from_prompt, args=("model", "prompt")) for _ in range(20)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - started < 0.5
+    assert client.max_concurrent == 20
+
+
+def test_losing_call_is_aborted_and_releases_its_slot():
+    slow = FakeOpenAIClient(name="slow", latency=2.0)
+    fast = FakeOpenAIClient(name="fast", latency=0.01)
+    helper = AIHelper({"openai": {
+        "credentials": {"slow": "sk-slow", "fast": "sk-fast"},
+        "credential_pool": ["slow"],
+        "hedging": {"enabled": True, "min_delay": 0.05, "min_samples": 1000, "max_hedge_rate": 1.0, "credential": "fast"},
+    }})
+    use_fake_clients(helper._pool, slow=slow, fast=fast)
+
+    started = time.perf_counter()
+    assert helper.genrate_from_prompt("model", "prompt") == "fast"
+    assert time.perf_counter() - started < 0.5
+    assert all(stats["in_flight"] == 0 for stats in helper.credential_stats())
+
+    # The slow primary stops at its next chunk instead of running for 2s.
+    deadline = time.monotonic() + 1.0
+    while slow.aborted == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert slow.aborted == 1 and slow.concurrent == 0
+    assert helper.hedging_stats()["aborted"] == 1
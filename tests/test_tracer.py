@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.Tracer import _NOOP_SPAN, JsonlExporter, RingBufferExporter, Tracer, tracer as global_tracer
+
+
+def make_tracer(sample_rate=1.0):
+    buffer = RingBufferExporter()
+    tracer = Tracer()
+    tracer.configure(sample_rate=sample_rate, exporters=[buffer])
+    return tracer, buffer
+
+
+def only_trace(buffer):
+    traces = buffer.slowest()
+    assert len(traces) == 1
+    return traces[0]
+
+
+def spans_by_name(record):
+    return {span["name"]: span for span in record["spans"]}
+
+
+def test_nested_spans_form_one_trace():
+    tracer, buffer = make_tracer()
+
+    with tracer.trace("request", path="/chat") as root:
+        with tracer.span("stage", stage="AWAITING_ANSWER_2") as stage:
+            with tracer.span("llm") as llm:
+                llm.set("total_tokens", 42)
+        tracer.add_time("log_seconds", 0.25)
+        tracer.add_time("log_seconds", 0.25)
+        assert tracer.active()
+    assert not tracer.active()
+
+    record = only_trace(buffer)
+    spans = spans_by_name(record)
+    assert record["name"] == "request"
+    assert spans["request"]["parent_id"] is None
+    assert spans["stage"]["parent_id"] == root.span_id
+    assert spans["llm"]["parent_id"] == stage.span_id
+    assert spans["llm"]["attributes"] == {"total_tokens": 42}
+    assert spans["request"]["attributes"] == {"path": "/chat", "log_seconds": 0.5}
+    assert [span["name"] for span in record["spans"]] == ["request", "stage", "llm"]
+
+
+def test_errors_are_recorded_on_the_span():
+    tracer, buffer = make_tracer()
+
+    try:
+        with tracer.trace("request"):
+            with tracer.span("llm"):
+                raise TimeoutError("upstream")
+    except TimeoutError:
+        pass
+
+    spans = spans_by_name(only_trace(buffer))
+    assert spans["llm"]["attributes"]["error"] == "TimeoutError('upstream')"
+    assert "error" in spans["request"]["attributes"]
+
+
+def test_unsampled_traces_are_noops():
+    tracer, buffer = make_tracer(sample_rate=0.0)
+
+    with tracer.trace("request") as root:
+        assert root is _NOOP_SPAN
+        assert tracer.span("stage") is _NOOP_SPAN
+        assert not tracer.active()
+    assert tracer.span("outside") is _NOOP_SPAN
+    assert buffer.slowest() == []
+
+
+def test_traces_are_exported_by_their_own_tracer(monkeypatch):
+    global_buffer = RingBufferExporter()
+    monkeypatch.setattr(global_tracer, "exporters", [global_buffer])
+    tracer, buffer = make_tracer()
+
+    with tracer.trace("request"):
+        # Spans opened through another tracer join the active trace.
+        with global_tracer.span("helper"):
+            pass
+
+    assert global_buffer.slowest() == []
+    assert set(spans_by_name(only_trace(buffer))) == {"request", "helper"}
+
+
+def test_context_follows_to_thread_and_tasks():
+    tracer, buffer = make_tracer()
+
+    def blocking_call():
+        with tracer.span("to_thread", thread=threading.current_thread().name):
+            pass
+
+    async def background():
+        with tracer.span("task"):
+            await asyncio.sleep(0)
+
+    async def handler():
+        with tracer.trace("request"):
+            await asyncio.to_thread(blocking_call)
+            await asyncio.create_task(background())
+
+    asyncio.run(handler())
+
+    spans = spans_by_name(only_trace(buffer))
+    root_id = spans["request"]["span_id"]
+    assert spans["to_thread"]["parent_id"] == root_id
+    assert spans["to_thread"]["attributes"]["thread"] != threading.current_thread().name
+    assert spans["task"]["parent_id"] == root_id
+
+
+def test_wrap_carries_context_into_thread_pools():
+    tracer, buffer = make_tracer()
+
+    def step(key):
+        with tracer.span("step", key=key):
+            return tracer.active()
+
+    with tracer.trace("stage"):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            wrapped = [executor.submit(tracer.wrap(step), key) for key in ("outline", "title")]
+            unwrapped = executor.submit(step, "lost")
+            assert [future.result() for future in wrapped] == [True, True]
+            assert unwrapped.result() is False
+
+    record = only_trace(buffer)
+    assert sorted(span["attributes"].get("key", "") for span in record["spans"]) == ["", "outline", "title"]
+
+
+def test_ring_buffer_returns_slowest_first_and_keeps_the_latest():
+    buffer = RingBufferExporter(capacity=3)
+    for index, duration in enumerate([5.0, 1.0, 9.0, 3.0]):
+        buffer.export({"name": f"trace {index}", "duration_ms": duration})
+
+    assert [record["name"] for record in buffer.slowest()] == ["trace 2", "trace 3", "trace 1"]
+    assert [record["name"] for record in buffer.slowest(limit=1)] == ["trace 2"]
+
+
+def test_jsonl_exporter_appends_one_line_per_trace(tmp_path):
+    path = tmp_path / "traces" / "traces.jsonl"
+    tracer = Tracer()
+    tracer.configure(sample_rate=1.0, exporters=[JsonlExporter(path)])
+
+    for name in ("first", "second"):
+        with tracer.trace(name):
+            with tracer.span("child"):
+                pass
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["name"] for record in records] == ["first", "second"]
+    assert all(len(record["spans"]) == 2 for record in records)
+
+
+def test_failing_exporter_does_not_break_the_request():
+    class BrokenExporter:
+        def export(self, record):
+            raise OSError("disk full")
+
+    tracer, buffer = make_tracer()
+    tracer.exporters.insert(0, BrokenExporter())
+
+    with tracer.trace("request"):
+        pass
+
+    assert only_trace(buffer)["name"] == "request"
+
+
+def test_debug_traces_lists_sampled_requests(app_client, app_module, monkeypatch):
+    buffer = RingBufferExporter()
+    monkeypatch.setattr(app_module, "trace_buffer", buffer)
+    monkeypatch.setattr(global_tracer, "exporters", [buffer])
+    monkeypatch.setattr(global_tracer, "sample_rate", 1.0)
+
+    app_client.post("/start-session", json={"name": "Asha", "stream": "Engineering", "major": "Robotics", "college": "MIT"})
+    traces = app_client.get("/debug/traces", params={"limit": 5}).json()
+
+    record = next(record for record in traces if record["name"] == "POST /start-session")
+    names = {span["name"] for span in record["spans"]}
+    assert {"AnswerGenerator.stage", "AnswerGenerator.step"} <= names
+    assert spans_by_name(record)["POST /start-session"]["attributes"]["status_code"] == 200